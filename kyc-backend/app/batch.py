@@ -0,0 +1,234 @@
+"""
+Offline re-verification over every user's latest KYC document.
+
+    python -m app.batch                          # ocr + face + decision
+    python -m app.batch --stages face,decision   # re-score after a threshold change
+    python -m app.batch --resume                 # continue from the checkpoint
+
+Documents are read in keyset-paginated chunks (id > last_id), OCR and face
+matching run in a process pool, results are bulk-upserted per chunk and the
+last finished id is checkpointed, so a stopped run resumes where it left off.
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from .database import session_scope
+from .models import KYCDocument
+from . import crud
+
+
+STAGES = ("ocr", "face", "decision")
+CPU_COUNT = os.cpu_count() or 1
+
+
+# -------------------------
+# CHECKPOINT
+# -------------------------
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"last_id": 0, "processed": 0, "failed": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, state: dict):
+    # write + rename, so a crash never leaves a half-written file
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+# -------------------------
+# READING (keyset pagination)
+# -------------------------
+def fetch_chunk(db, after_id: int, size: int, until_id: int | None = None):
+    """
+    Next `size` documents with id > after_id, only the latest one per user
+    (OCR / face results are stored per user).
+    """
+    newer = aliased(KYCDocument)
+    latest = ~select(newer.id).where(
+        newer.user_id == KYCDocument.user_id,
+        newer.id > KYCDocument.id
+    ).exists()
+
+    query = (
+        select(
+            KYCDocument.id,
+            KYCDocument.user_id,
+            KYCDocument.aadhaar_front_path,
+            KYCDocument.aadhaar_face_path,
+            KYCDocument.selfie_path,
+            KYCDocument.aadhaar_face_hash,
+            KYCDocument.selfie_hash
+        )
+        .where(KYCDocument.id > after_id, latest)
+        .order_by(KYCDocument.id)
+        .limit(size)
+    )
+    if until_id is not None:
+        query = query.where(KYCDocument.id <= until_id)
+
+    # plain tuples: they go to the worker processes as they are
+    return [tuple(row) for row in db.execute(query).all()]
+
+
+# -------------------------
+# WORKER SIDE
+# -------------------------
+def init_worker(stages, threads: int):
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["OCR_CPU_THREADS"] = str(threads)
+
+    # load models once per process, before the first document
+    if "ocr" in stages:
+        from .services import ocr_service
+        ocr_service.get_ocr()
+    if "face" in stages:
+        from .services import face_service
+        face_service.get_face_app()
+
+
+def process_document(stages, doc):
+    doc_id, user_id, front_path, face_path, selfie_path, face_hash, selfie_hash = doc
+    out = {"doc_id": doc_id, "user_id": user_id, "ocr": None, "face": None, "error": None}
+
+    try:
+        if "ocr" in stages and front_path:
+            from .services import ocr_service
+            out["ocr"] = ocr_service.run_ocr(front_path)
+
+        if "face" in stages and face_path and selfie_path:
+            from .services.embedding_service import compare_faces_cached
+
+            # embeddings of already-seen files come from the cache
+            with session_scope() as db:
+                result = compare_faces_cached(
+                    db, face_path, selfie_path,
+                    aadhaar_hash=face_hash, selfie_hash=selfie_hash
+                )
+                db.commit()
+
+            if "similarity" in result:
+                out["face"] = result
+            else:
+                out["error"] = result.get("error")
+    except Exception as e:
+        out["error"] = str(e)
+
+    return out
+
+
+# -------------------------
+# PARENT SIDE
+# -------------------------
+def write_chunk(stages, results):
+    """One transaction per chunk: bulk upserts, then the decisions."""
+    ocr = {r["user_id"]: r["ocr"] for r in results if r["ocr"]}
+    face = {r["user_id"]: r["face"] for r in results if r["face"]}
+
+    with session_scope() as db:
+        crud.bulk_upsert_ocr_data(db, ocr)
+        crud.bulk_upsert_face_verification(db, face)
+
+        decisions = {}
+        if "decision" in stages:
+            from .services.decision_service import decide_users
+            # commits the upserts together with the new statuses
+            decisions = decide_users(db, {r["user_id"] for r in results})
+        else:
+            db.commit()
+
+    return decisions
+
+
+def run(args):
+    stages = tuple(s for s in STAGES if s in args.stages.split(","))
+    if not stages:
+        raise SystemExit(f"--stages must contain some of {','.join(STAGES)}")
+
+    state = load_checkpoint(args.checkpoint) if args.resume else {
+        "last_id": args.start_id, "processed": 0, "failed": []
+    }
+    state["stages"] = list(stages)
+    print(f"Stages: {','.join(stages)} | starting after document id {state['last_id']}")
+
+    pool = None
+    if "ocr" in stages or "face" in stages:
+        pool = ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=get_context("spawn"),
+            initializer=init_worker,
+            initargs=(stages, max(1, CPU_COUNT // args.workers))
+        )
+
+    done = 0  # this run only; state["processed"] spans resumed runs
+    started = time.perf_counter()
+    try:
+        while args.limit is None or done < args.limit:
+            size = args.chunk_size
+            if args.limit is not None:
+                size = min(size, args.limit - done)
+
+            with session_scope() as db:
+                docs = fetch_chunk(db, state["last_id"], size, args.until_id)
+            if not docs:
+                break
+
+            if pool is not None:
+                results = list(pool.map(
+                    process_document, [stages] * len(docs), docs,
+                    chunksize=max(1, len(docs) // (args.workers * 4))
+                ))
+            else:
+                results = [
+                    {"doc_id": d[0], "user_id": d[1], "ocr": None, "face": None, "error": None}
+                    for d in docs
+                ]
+
+            decisions = write_chunk(stages, results)
+
+            failed = [r["doc_id"] for r in results if r["error"]]
+            state["failed"].extend(failed)
+            state["last_id"] = docs[-1][0]
+            state["processed"] += len(docs)
+            save_checkpoint(args.checkpoint, state)
+            done += len(docs)
+
+            verified = sum(d["final_status"] == "VERIFIED" for d in decisions.values())
+            rate = done / (time.perf_counter() - started)
+            print(
+                f"up to id {state['last_id']} | {state['processed']} done "
+                f"| {len(failed)} failed | {verified} verified | {rate:.1f} docs/s"
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    print(f"Finished: {state['processed']} documents, {len(state['failed'])} failed")
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.batch", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma separated: ocr,face,decision")
+    parser.add_argument("--chunk-size", type=int, default=200, help="documents per read / write")
+    parser.add_argument("--workers", type=int, default=max(1, CPU_COUNT // 4), help="worker processes")
+    parser.add_argument("--checkpoint", default="batch_checkpoint.json")
+    parser.add_argument("--resume", action="store_true", help="continue after the checkpoint's last id")
+    parser.add_argument("--start-id", type=int, default=0, help="start after this document id")
+    parser.add_argument("--until-id", type=int, default=None, help="stop at this document id")
+    parser.add_argument("--limit", type=int, default=None, help="max documents this run")
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
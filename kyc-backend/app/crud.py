@@ -0,0 +1,221 @@
+import json
+import uuid
+import numpy as np
+from sqlalchemy import case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import OCRData, KYCJob, FaceEmbedding, LivenessLogs, FaceVerification
+
+
+# -------------------------
+# OCR DATA
+# -------------------------
+def upsert_ocr_data(db: Session, user_id: int, ocr_result: dict):
+    existing = db.query(OCRData).filter(OCRData.user_id == user_id).first()
+
+    if not existing:
+        existing = OCRData(user_id=user_id)
+        db.add(existing)
+
+    # a new OCR name invalidates the stored name match
+    if existing.name != ocr_result.get("name"):
+        existing.name_score = None
+        existing.name_match = None
+        existing.name_sort_score = None
+
+    existing.aadhaar_number = ocr_result.get("aadhaar_number")
+    existing.aadhaar_full = ocr_result.get("aadhaar_full")
+    existing.name = ocr_result.get("name")
+    existing.dob = ocr_result.get("dob")
+    existing.gender = ocr_result.get("gender")
+    existing.confidence_score = ocr_result.get("confidence")
+
+    return existing
+
+
+def bulk_upsert_ocr_data(db: Session, results: dict):
+    """user_id -> ocr_result, written with one INSERT .. ON CONFLICT."""
+    if not results:
+        return
+
+    stmt = pg_insert(OCRData).values([
+        {
+            "user_id": user_id,
+            "aadhaar_number": r.get("aadhaar_number"),
+            "aadhaar_full": r.get("aadhaar_full"),
+            "name": r.get("name"),
+            "dob": r.get("dob"),
+            "gender": r.get("gender"),
+            "confidence_score": r.get("confidence")
+        }
+        for user_id, r in results.items()
+    ])
+    new = stmt.excluded
+    name_changed = OCRData.name.is_distinct_from(new.name)
+
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[OCRData.user_id],
+        set_={
+            "aadhaar_number": new.aadhaar_number,
+            "aadhaar_full": new.aadhaar_full,
+            "name": new.name,
+            "dob": new.dob,
+            "gender": new.gender,
+            "confidence_score": new.confidence_score,
+            # same rule as upsert_ocr_data: a new name drops the stored match
+            "name_score": case((name_changed, None), else_=OCRData.name_score),
+            "name_match": case((name_changed, None), else_=OCRData.name_match),
+            "name_sort_score": case((name_changed, None), else_=OCRData.name_sort_score)
+        }
+    ))
+
+
+# -------------------------
+# FACE VERIFICATION
+# -------------------------
+def bulk_upsert_face_verification(db: Session, results: dict):
+    """user_id -> compare_faces result (similarity / match)."""
+    if not results:
+        return
+
+    stmt = pg_insert(FaceVerification).values([
+        {
+            "user_id": user_id,
+            "similarity_score": r["similarity"],
+            "match_status": r["match"]
+        }
+        for user_id, r in results.items()
+    ])
+
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[FaceVerification.user_id],
+        set_={
+            "similarity_score": stmt.excluded.similarity_score,
+            "match_status": stmt.excluded.match_status
+        }
+    ))
+
+
+# -------------------------
+# KYC JOBS
+# -------------------------
+TERMINAL_JOB_STATUSES = {"DONE", "FAILED"}
+
+
+def create_job(db: Session, user_id: int, document_id: int, **lease) -> KYCJob:
+    """`lease`: owner / lease_until, see job_service.new_lease()."""
+    job = KYCJob(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        document_id=document_id,
+        status="QUEUED",
+        **lease
+    )
+    db.add(job)
+    return job
+
+
+def get_job(db: Session, job_id: str):
+    return db.query(KYCJob).filter(KYCJob.id == job_id).first()
+
+
+def update_job(db: Session, job_id: str, **fields):
+    job = get_job(db, job_id)
+    if not job:
+        return None
+
+    for key, value in fields.items():
+        setattr(job, key, value)
+
+    db.commit()
+    return job
+
+
+def job_to_dict(job: KYCJob) -> dict:
+    return {
+        "job_id": job.id,
+        "user_id": job.user_id,
+        "status": job.status,
+        "stage": job.stage,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None
+    }
+
+
+# -------------------------
+# FACE EMBEDDINGS (cache)
+# -------------------------
+def get_embeddings(db: Session, file_hash: str, version: str) -> dict:
+    rows = db.query(FaceEmbedding).filter(
+        FaceEmbedding.file_hash == file_hash,
+        FaceEmbedding.model_version == version
+    ).all()
+
+    return {
+        row.variant: (
+            np.frombuffer(row.embedding, dtype=np.float32)
+            if row.embedding is not None else None
+        )
+        for row in rows
+    }
+
+
+def save_embeddings(db: Session, file_hash: str, version: str, embeddings: dict):
+    existing = set(get_embeddings(db, file_hash, version))
+
+    for variant, emb in embeddings.items():
+        if variant in existing:
+            continue
+
+        try:
+            # another request may store the same image at the same time
+            with db.begin_nested():
+                db.add(FaceEmbedding(
+                    file_hash=file_hash,
+                    variant=variant,
+                    model_version=version,
+                    embedding=(
+                        np.asarray(emb, dtype=np.float32).tobytes()
+                        if emb is not None else None
+                    )
+                ))
+        except IntegrityError:
+            pass
+
+
+# -------------------------
+# LIVENESS
+# -------------------------
+def update_liveness(db: Session, user_id: int, blink=None, head_turn=None):
+    """
+    blink: result of a blink attempt (overwrites), None = not attempted.
+    head_turn: True once a turn is seen (never reset), None = not attempted.
+    """
+    log = db.query(LivenessLogs).filter(
+        LivenessLogs.user_id == user_id
+    ).first()
+
+    if not log:
+        log = LivenessLogs(
+            user_id=user_id,
+            blink_detected=False,
+            head_turn_detected=False,
+            status=False
+        )
+        db.add(log)
+
+    if blink is not None:
+        log.blink_detected = blink
+
+    if head_turn:
+        log.head_turn_detected = True
+
+    # Final liveness status
+    if log.blink_detected and log.head_turn_detected:
+        log.status = True
+
+    return log
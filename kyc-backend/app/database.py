@@ -1,15 +1,205 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 import os
+import time
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# -------------------------
+# POOL CONFIG
+# -------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))        # wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))        # seconds, -1 = never
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))  # 0 = off
+
+# -------------------------
+# POOL METRICS
+# -------------------------
+_metrics_lock = threading.Lock()
+pool_metrics = {
+    name: {"connects": 0, "checkouts": 0, "checkins": 0, "wait_seconds": 0.0, "timeouts": 0}
+    for name in ("sync", "async")
+}
+
+
+def count(name: str, key: str, value=1):
+    with _metrics_lock:
+        pool_metrics[name][key] += value
+
+
+class TimedPoolMixin:
+    """
+    Times every checkout at the pool itself, so the wait is measured
+    whichever way the connection is taken (get_db, session_scope, async).
+    """
+    metrics_name = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            count(self.metrics_name, "timeouts")
+            raise
+        finally:
+            count(self.metrics_name, "wait_seconds", time.perf_counter() - start)
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    metrics_name = "sync"
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+connect_args = {}
+if (DATABASE_URL or "").startswith("postgresql") and DB_STATEMENT_TIMEOUT_MS:
+    connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
 engine = create_engine(
-    DATABASE_URL
+    DATABASE_URL,
+    poolclass=TimedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=connect_args
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+
+# -------------------------
+# ASYNC ENGINE (DB-only endpoints)
+# -------------------------
+def async_database_url():
+    """
+    ASYNC_DATABASE_URL if set, else DATABASE_URL switched to asyncpg.
+    Returns (url, connect_args) since asyncpg takes ssl / timeouts differently.
+    """
+    args = {}
+    url = make_url(os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL)
+
+    if url.drivername.startswith("postgresql"):
+        sslmode = url.query.get("sslmode")
+        url = url.difference_update_query(["sslmode"]).set(drivername="postgresql+asyncpg")
+        if sslmode and sslmode != "disable":
+            args["ssl"] = sslmode
+        if DB_STATEMENT_TIMEOUT_MS:
+            args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+
+    return url, args
+
+
+ASYNC_DATABASE_URL, async_connect_args = async_database_url()
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=async_connect_args
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+# -------------------------
+# POOL EVENTS
+# -------------------------
+def track_pool(name: str, sync_engine):
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_conn, conn_record):
+        count(name, "connects")
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_conn, conn_record, conn_proxy):
+        count(name, "checkouts")
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_conn, conn_record):
+        count(name, "checkins")
+
+
+track_pool("sync", engine)
+track_pool("async", async_engine.sync_engine)
+
+
+def pool_stats() -> dict:
+    result = {}
+    for name, eng in (("sync", engine), ("async", async_engine.sync_engine)):
+        pool = eng.pool
+        with _metrics_lock:
+            stats = dict(pool_metrics[name])
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "idle": pool.checkedin()
+        })
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        result[name] = stats
+    return result
+
+
+# -------------------------
+# SESSIONS
+# -------------------------
+def checkout_connection(db):
+    """
+    Takes the pooled connection now (the pool records the wait), so
+    a pool timeout surfaces here and not in the middle of the work.
+    """
+    db.connection()
+
+
+@contextmanager
+def session_scope():
+    """
+    Short-lived session for the actual DB work only:
+
+        with session_scope() as db:
+            ...
+            db.commit()
+    """
+    db = SessionLocal()
+    try:
+        checkout_connection(db)
+        yield db
+    finally:
+        db.close()
+
+
+def get_db():
+    # shared FastAPI dependency. The session only takes a pooled connection
+    # on its first query, and gives it back at commit / close.
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    # for endpoints that only touch the DB: no threadpool slot, no psycopg2
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_JSON = os.getenv("LOG_JSON", "true").lower() == "true"
+
+# ML stages run from ~1 ms (a dot product) to tens of seconds (OCR on a bad scan)
+STAGE_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 40.0
+)
+
+
+# -------------------------
+# METRICS
+# -------------------------
+STAGE_SECONDS = Histogram(
+    "kyc_stage_seconds", "Time spent per pipeline stage", ["stage"],
+    buckets=STAGE_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    "kyc_stage_errors_total", "Stages that raised", ["stage"]
+)
+REQUEST_SECONDS = Histogram(
+    "kyc_http_request_seconds", "HTTP request latency", ["method", "route", "status"],
+    buckets=STAGE_BUCKETS
+)
+
+
+# -------------------------
+# REQUEST ID + LOGGING
+# -------------------------
+# set per request by the middleware, per job by the job workers
+request_id_var = ContextVar("request_id", default="-")
+
+# attributes every LogRecord has; anything else came in through extra={}
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message"}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        body = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": request_id_var.get(),
+            "msg": record.getMessage()
+        }
+        body.update({
+            k: v for k, v in vars(record).items()
+            if k not in _RECORD_FIELDS and not k.startswith("_")
+        })
+        if record.exc_info:
+            body["exc"] = self.formatException(record.exc_info)
+        return json.dumps(body, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    # plain-text logs get the id too: "%(request_id)s"
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+def setup_logging():
+    handler = logging.StreamHandler()
+    if LOG_JSON:
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.addFilter(RequestIdFilter())
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+        ))
+
+    log = logging.getLogger("kyc")
+    log.handlers = [handler]
+    log.setLevel(LOG_LEVEL)
+    log.propagate = False
+
+
+def get_logger(name: str):
+    """Loggers under "kyc", e.g. get_logger(__name__) -> kyc.app.services.x"""
+    return logging.getLogger(f"kyc.{name}")
+
+
+logger = get_logger(__name__)
+
+
+# -------------------------
+# SPANS
+# -------------------------
+@contextmanager
+def span(stage: str, **fields):
+    """
+    Times a block into kyc_stage_seconds{stage=...}:
+
+        with span("face_extract"):
+            ...
+
+    `fields` only go to the debug log line, never into metric labels.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("span", extra={"stage": stage, "ms": round(elapsed * 1000, 2), **fields})
+
+
+# -------------------------
+# DB COMMITS
+# -------------------------
+@event.listens_for(Session, "before_commit")
+def _commit_started(session):
+    session.info["commit_start"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_finished(session):
+    start = session.info.pop("commit_start", None)
+    if start is not None:
+        # flush + COMMIT round trip
+        STAGE_SECONDS.labels("db_commit").observe(time.perf_counter() - start)
+
+
+# -------------------------
+# HTTP MIDDLEWARE
+# -------------------------
+async def request_context(request, call_next):
+    """
+    Request id (X-Request-ID in or a new one, echoed back), latency
+    histogram per route template and one access log line.
+    """
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    start = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+
+        # template ("/kyc/status/{user_id}"), not the raw path: bounded labels
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+
+        REQUEST_SECONDS.labels(request.method, path, str(status)).observe(elapsed)
+        logger.info("request", extra={
+            "method": request.method,
+            "route": path,
+            "status": status,
+            "ms": round(elapsed * 1000, 2)
+        })
+        request_id_var.reset(token)
+
+
+# -------------------------
+# POOL GAUGES (read at scrape time)
+# -------------------------
+class PoolCollector:
+    def describe(self):
+        # nothing up front: keeps registration from importing the services
+        return []
+
+    def collect(self):
+        from .database import pool_stats
+        from .services.liveness_service import face_mesh_pool
+        from .services import ocr_pool
+
+        sources = [("db", pool_stats())]
+        sources.append(("facemesh", {"default": face_mesh_pool.stats()}))
+        sources.append(("ocr", {"default": ocr_pool.stats()}))
+
+        for pool_name, pools in sources:
+            families = {}
+            for label, stats in pools.items():
+                for key, value in stats.items():
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        continue
+                    family = families.get(key)
+                    if family is None:
+                        family = families[key] = GaugeMetricFamily(
+                            f"kyc_{pool_name}_pool_{key}",
+                            f"{pool_name} pool: {key}",
+                            labels=["pool"]
+                        )
+                    family.add_metric([label], value)
+            yield from families.values()
+
+
+_collector_lock = threading.Lock()
+_collector_registered = False
+
+
+def register_pool_collector():
+    global _collector_registered
+    with _collector_lock:
+        if not _collector_registered:
+            REGISTRY.register(PoolCollector())
+            _collector_registered = True
@@ -1,14 +1,40 @@
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .database import engine
-from .models import Base
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from .database import pool_stats
+from .instrumentation import setup_logging, request_context, register_pool_collector
 from .routers import user
 from .routers import upload
 from .routers import kyc
 from .routers import selfie
 from .routers import liveness
+from .services import ocr_pool
+from .services import model_service
+from .services import job_service
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+
+setup_logging()
+register_pool_collector()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load + warm models in the background; /readyz flips once done
+    threading.Thread(
+        target=model_service.load_models, name="model-loader", daemon=True
+    ).start()
+    # renews this process' job leases, picks up jobs whose owner died
+    threading.Thread(
+        target=job_service.keep_leases, name="job-leases", daemon=True
+    ).start()
+    yield
+    ocr_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # from fastapi.middleware.cors import CORSMiddleware
 
@@ -20,15 +46,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# request id + latency histogram + access log for every request
+app.middleware("http")(request_context)
+
 app.include_router(user.router)
 app.include_router(upload.router)
 app.include_router(kyc.router)
 app.include_router(selfie.router)
 app.include_router(liveness.router)
 
-
-Base.metadata.create_all(bind=engine)
+# schema is managed by Alembic: run `alembic upgrade head` before starting
 
 @app.get("/")
 def home():
     return {"msg": "KYC API Running on Port 8080 "}
+
+
+# -------------------------
+# PROBES
+# -------------------------
+@app.get("/healthz")
+def healthz():
+    # liveness: the process is up and serving
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    # readiness: every model this worker owns is loaded and warm
+    body = {"ready": model_service.is_ready(), "models": model_service.model_status}
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
+
+
+
+@app.get("/db/pool-stats")
+def db_pool_stats():
+    # connection pool usage: checked out / overflow / wait time / timeouts
+    return pool_stats()
+
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus scrape: stage / request histograms + db, facemesh, ocr pool gauges
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
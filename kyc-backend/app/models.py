@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Boolean, Text, LargeBinary, UniqueConstraint, Index
 from datetime import datetime
 from .database import Base
 
@@ -15,6 +15,9 @@ class User(Base):
     kyc_status = Column(String, default="BASIC_SUBMITTED")
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # login looks users up by email + mobile together
+    __table_args__ = (Index("ix_users_email_mobile", "email", "mobile"),)
+
 
 class KYCDocument(Base):
     __tablename__ = "kyc_documents"
@@ -25,6 +28,13 @@ class KYCDocument(Base):
     aadhaar_back_path = Column(String)
     aadhaar_face_path = Column(String, nullable=True)
     selfie_path = Column(String, nullable=True)
+    # sha256 of those files = embedding cache keys (no re-read at face-match)
+    aadhaar_face_hash = Column(String, nullable=True)
+    selfie_hash = Column(String, nullable=True)
+
+    # "latest document of a user": WHERE user_id = ? ORDER BY id DESC LIMIT 1
+    __table_args__ = (Index("ix_kyc_documents_user_id_id_desc", user_id, id.desc()),)
+
 
 class OCRData(Base):
     __tablename__ = "ocr_data"
@@ -36,6 +46,9 @@ class OCRData(Base):
     dob = Column(String)
     gender = Column(String)
     confidence_score = Column(Float)
+    name_score = Column(Float, nullable=True)     # match_names vs the user's name, NULL = not checked
+    name_match = Column(Boolean, nullable=True)
+    name_sort_score = Column(Float, nullable=True)  # sort_score, what the final decision uses
 
 
 class FaceVerification(Base):
@@ -53,3 +66,33 @@ class LivenessLogs(Base):
     blink_detected = Column(Boolean)
     head_turn_detected = Column(Boolean)
     status = Column(Boolean)
+
+
+class KYCJob(Base):
+    __tablename__ = "kyc_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4
+    user_id = Column(Integer, ForeignKey("users.id"))
+    document_id = Column(Integer, ForeignKey("kyc_documents.id"))
+    status = Column(String, default="QUEUED")  # QUEUED / RUNNING / DONE / FAILED
+    stage = Column(String, nullable=True)      # face / ocr
+    result = Column(Text, nullable=True)       # OCR result as JSON
+    error = Column(String, nullable=True)
+    owner = Column(String, nullable=True)         # process whose queues hold the job
+    lease_until = Column(DateTime, nullable=True) # renewed by the owner; expired = resumable
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class FaceEmbedding(Base):
+    __tablename__ = "face_embeddings"
+    __table_args__ = (
+        UniqueConstraint("file_hash", "variant", "model_version", name="uq_face_embeddings_hash_variant_version"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    file_hash = Column(String, index=True)          # sha256 of the image file
+    variant = Column(String)                        # selfie / original / denoised / enhanced
+    model_version = Column(String)                  # face_service.EMBEDDING_VERSION it was computed with
+    embedding = Column(LargeBinary, nullable=True)  # float32 normed embedding, NULL = no face
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, UploadFile, File
 from sqlalchemy.orm import Session
-from fuzzywuzzy import fuzz
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
+from pydantic import BaseModel, Field
 
 
 
@@ -17,22 +18,19 @@ from ..models import (
     LivenessLogs
 )
 
-from ..database import SessionLocal
+from ..database import get_db, get_async_db
 
-from ..services.face_service import compare_faces
-from ..services.matching_service import match_names
+from ..services.embedding_service import compare_faces_cached
+from ..services.matching_service import match_names, sort_score
+from ..services.decision_service import decide_users
+from ..instrumentation import get_logger
 
 
 
 router = APIRouter(prefix="/kyc", tags=["KYC"])
+logger = get_logger(__name__)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
 # =========================================
@@ -55,11 +53,19 @@ def face_match(user_id: int, db: Session = Depends(get_db)):
     if not doc.selfie_path:
         raise HTTPException(status_code=400, detail="Selfie not found")
 
-    result = compare_faces(
+    # embeddings were stored at upload / capture time -> just dot products
+    result = compare_faces_cached(
+        db,
         doc.aadhaar_face_path,
-        doc.selfie_path
+        doc.selfie_path,
+        aadhaar_hash=doc.aadhaar_face_hash,
+        selfie_hash=doc.selfie_hash
     )
 
+    # file missing / unreadable: nothing to score
+    if "similarity" not in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+
     # Save in face_verification table
     record = db.query(FaceVerification).filter(
         FaceVerification.user_id == user_id
@@ -100,6 +106,12 @@ def validate_name(user_id: int, db: Session = Depends(get_db)):
 
     result = match_names(full_name, ocr.name)
 
+    # kept so the final decision doesn't re-score the name;
+    # it gates on the strict sort score, not this lenient verdict
+    ocr.name_score = result["score"]
+    ocr.name_match = result["match"]
+    ocr.name_sort_score = sort_score(full_name, ocr.name)
+
     # update status
     if result["match"]:
         user.kyc_status = "NAME_VERIFIED"
@@ -112,111 +124,49 @@ def validate_name(user_id: int, db: Session = Depends(get_db)):
 
 
 
-# -------------------------------------------------
-# MODULE 10: Final KYC Decision Engine
-# -------------------------------------------------
 # -------------------------------------------------
 # MODULE 10: Final KYC Decision Engine (Updated)
 # -------------------------------------------------
-@router.post("/final-decision/{user_id}")
-def final_kyc_decision(user_id: int, db: Session = Depends(get_db)):
+class BatchDecisionRequest(BaseModel):
+    user_ids: list[int] = Field(min_length=1, max_length=1000)
 
-    # 1. Fetch Records
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
-    ocr = db.query(OCRData).filter(OCRData.user_id == user_id).first()
-    face = db.query(FaceVerification).filter(FaceVerification.user_id == user_id).first()
-    liveness = db.query(LivenessLogs).filter(LivenessLogs.user_id == user_id).first()
-
-    # 2. Evaluate Individual Modules
-    
-    # A. OCR Status
-    ocr_passed = (
-        ocr is not None 
-        and ocr.confidence_score is not None 
-        and ocr.confidence_score >= 0.75
-    )
+# declared before /final-decision/{user_id} so "batch" isn't read as an id
+@router.post("/final-decision/batch")
+def final_kyc_decision_batch(body: BatchDecisionRequest, db: Session = Depends(get_db)):
 
-    # B. Liveness Status
-    liveness_passed = (
-        liveness is not None 
-        and liveness.status is True
-    )
+    decisions = decide_users(db, set(body.user_ids))
 
-    # C. Name Match (Get Score)
-    name_passed = False
-    name_score = 0
-    if ocr and ocr.name:
-        full_name = f"{user.first_name} {user.last_name}"
-        # We calculate exact score here to be sure
-        name_score = fuzz.token_sort_ratio(full_name.lower(), ocr.name.lower())
-        name_passed = name_score >= 80  # Strict name match
-
-    # D. Face Match (Get Score)
-    face_score = 0.0
-    if face and face.similarity_score:
-        face_score = float(face.similarity_score)
-
-    # 3. THE DECISION MATRIX (Logic Core)
-    
-    final_status = "FAILED"
-    reason = "Unknown"
-
-    # CRITICAL: OCR, Liveness, and Name MUST pass for any approval
-    if ocr_passed and liveness_passed and name_passed:
-        
-        # Scenario 1: Perfect Match (Auto-Verify)
-        if face_score >= 0.50:  # Standard threshold
-            final_status = "VERIFIED"
-            reason = "Auto-Verified: High Match"
-
-        # Scenario 2: "Child Photo" Case (Manual Review)
-        # Name is correct, User is alive, but Face match is low (0.20 - 0.40)
-        elif 0.30 <= face_score < 0.50:
-            final_status = "MANUAL_REVIEW"
-            reason = "Flagged: Name matched but Face score low (Old Photo?)"
-        
-        # Scenario 3: Face completely different
-        else:
-            final_status = "FAILED"
-            reason = "Face Mismatch"
+    return {
+        "decisions": [decisions[uid] for uid in body.user_ids if uid in decisions],
+        "not_found": [uid for uid in body.user_ids if uid not in decisions]
+    }
 
-    else:
-        # Failure Reasons
-        if not ocr_passed: reason = "OCR Failed"
-        elif not liveness_passed: reason = "Liveness Failed"
-        elif not name_passed: reason = "Name Mismatch"
 
-    # 4. Save & Return
-    user.kyc_status = final_status
-    db.commit()
+@router.post("/final-decision/{user_id}")
+def final_kyc_decision(user_id: int, db: Session = Depends(get_db)):
 
-    print("---- FINAL DECISION DEBUG ----")
-    print(f"User: {user_id} | Status: {final_status}")
-    print(f"Scores -> Name: {name_score}% | Face: {face_score}")
-    print(f"Reason: {reason}")
+    # user + OCR + face + liveness in one joined query
+    decision = decide_users(db, [user_id]).get(user_id)
+    if not decision:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    return {
+    logger.info("final decision", extra={
         "user_id": user_id,
-        "final_status": final_status,
-        "reason": reason,
-        "metrics": {
-            "ocr_passed": ocr_passed,
-            "liveness_passed": liveness_passed,
-            "name_score": name_score,
-            "face_score": face_score
-        }
-    }
+        "status": decision["final_status"],
+        "reason": decision["reason"],
+        **decision["metrics"]
+    })
+
+    return decision
 
 # =========================================
 # CHECK CURRENT STATUS
 # =========================================
 @router.get("/status/{user_id}")
-def get_status(user_id: int, db: Session = Depends(get_db)):
+async def get_status(user_id: int, db: AsyncSession = Depends(get_async_db)):
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -227,8 +177,8 @@ def get_status(user_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/ocr/{user_id}")
-def get_ocr(user_id: int, db: Session = Depends(get_db)):
-    ocr = db.query(OCRData).filter(OCRData.user_id == user_id).first()
+async def get_ocr(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    ocr = await db.get(OCRData, user_id)
 
     if not ocr:
         raise HTTPException(status_code=404, detail="OCR not found")
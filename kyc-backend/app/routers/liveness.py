@@ -1,22 +1,25 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import os
-import uuid
-import shutil
 
-from ..database import SessionLocal
-from ..models import LivenessLogs
-from ..services.liveness_service import verify_action
+from ..database import get_db, session_scope
+from .. import crud
+from ..services.liveness_service import (
+    verify_action,
+    decode_frames,
+    face_mesh_pool,
+    LivenessBusy,
+    LivenessStream
+)
 
 router = APIRouter(prefix="/liveness", tags=["Liveness"])
 
+STREAM_MAX_FRAMES = 300     # hard stop for one websocket session
+STREAM_IDLE_TIMEOUT = 10    # seconds without a frame before we give up
+STREAM_MAX_SECONDS = 60     # whole session: a slow client can't hold a FaceMesh for long
+
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
 @router.post("/step/{user_id}")
@@ -27,48 +30,18 @@ def liveness_step(
     db: Session = Depends(get_db)
 ):
 
-    os.makedirs("uploads/liveness", exist_ok=True)
-    frame_paths = []
-
-    # Save frames
-    for file in frames:
-        path = f"uploads/liveness/{uuid.uuid4()}.jpg"
-        with open(path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        frame_paths.append(path)
-
-    # Run verification
-    result = verify_action(frame_paths, action)
-
-    # Delete temp frames (avoid memory leak)
-    for path in frame_paths:
-        if os.path.exists(path):
-            os.remove(path)
+    # Run verification (frames decoded in memory, one at a time)
+    try:
+        result = verify_action(decode_frames(f.file for f in frames), action)
+    except LivenessBusy:
+        raise HTTPException(503, "Liveness busy, please retry")
 
     # Update DB
-    log = db.query(LivenessLogs).filter(
-        LivenessLogs.user_id == user_id
-    ).first()
-
-    if not log:
-        log = LivenessLogs(
-            user_id=user_id,
-            blink_detected=False,
-            head_turn_detected=False,
-            status=False
-        )
-        db.add(log)
-
-    if action == "blink":
-        log.blink_detected = result["success"]
-
-    if action in ["left", "right"]:
-        if result["success"]:
-            log.head_turn_detected = True
-
-    # Final liveness status
-    if log.blink_detected and log.head_turn_detected:
-        log.status = True
+    log = crud.update_liveness(
+        db, user_id,
+        blink=result["success"] if action == "blink" else None,
+        head_turn=result["success"] if action in ["left", "right"] else None
+    )
 
     db.commit()
 
@@ -76,3 +49,97 @@ def liveness_step(
         "success": result["success"],
         "overall_status": log.status
     }
+
+
+# -------------------------
+# STREAMING LIVENESS (WebSocket)
+# -------------------------
+def save_stream_result(user_id: int, blink: bool, head_turn: bool):
+    with session_scope() as db:
+        log = crud.update_liveness(db, user_id, blink=blink, head_turn=head_turn)
+        db.commit()
+        return log.status
+
+
+@router.websocket("/stream/{user_id}")
+async def liveness_stream(websocket: WebSocket, user_id: int):
+    """
+    Client sends each captured frame as a binary message (JPEG/PNG).
+    Server answers every frame with {"frame", "face", "blink", "head_turn", "done"}
+    and closes as soon as blink and head turn are both confirmed.
+    A text message closes the socket with 1003.
+    LivenessLogs is written once, when the session ends.
+    """
+    await websocket.accept()
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_SECONDS
+    face_mesh = None
+    stream = None
+    closed = False  # by the client, or by us on a text message
+    status = None
+
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+
+            try:
+                message = await asyncio.wait_for(
+                    websocket.receive(), timeout=min(STREAM_IDLE_TIMEOUT, remaining)
+                )
+            except asyncio.TimeoutError:
+                break
+
+            if message["type"] == "websocket.disconnect":
+                closed = True
+                break
+
+            data = message.get("bytes")
+            if data is None:
+                await websocket.close(code=1003, reason="Frames must be binary messages")
+                closed = True
+                break
+
+            # the FaceMesh is only taken once frames actually arrive
+            if stream is None:
+                try:
+                    face_mesh = await run_in_threadpool(face_mesh_pool.checkout)
+                except LivenessBusy:
+                    await websocket.close(code=1013, reason="Liveness busy, please retry")
+                    return
+                stream = LivenessStream(face_mesh)
+
+            verdict = await run_in_threadpool(stream.push, data)
+            await websocket.send_json(verdict)
+
+            if stream.done or stream.frames >= STREAM_MAX_FRAMES:
+                break
+
+    except WebSocketDisconnect:
+        closed = True
+
+    finally:
+        if face_mesh is not None:
+            await run_in_threadpool(face_mesh_pool.checkin, face_mesh)
+
+        if stream is not None:
+            status = await run_in_threadpool(
+                save_stream_result, user_id, stream.blink.done, stream.head_turn.done
+            )
+
+    if closed:
+        return
+
+    try:
+        await websocket.send_json({"done": True, "overall_status": status})
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+
+@router.get("/pool-stats")
+def pool_stats():
+    # FaceMesh pool contention (waits / wait time / timeouts)
+    return face_mesh_pool.stats()
@@ -1,25 +1,16 @@
-import os
 import uuid
-import shutil
 
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from ..database import SessionLocal
+from ..database import get_db
 from ..models import KYCDocument
+from ..services.image_service import ImageHandle
+from ..services import embedding_service
 
 router = APIRouter(prefix="/selfie", tags=["Selfie"])
 
 
-# ---------------------------
-# DB dependency
-# ---------------------------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
 # ---------------------------
@@ -38,15 +29,15 @@ def capture_selfie(
     - Store path in DB
     """
 
-    # ✅ create folder
-    os.makedirs("uploads/selfie", exist_ok=True)
-
     filename = f"{uuid.uuid4()}.jpg"
     path = f"uploads/selfie/{filename}"
 
-    # save file
-    with open(path, "wb") as buffer:
-        shutil.copyfileobj(selfie.file, buffer)
+    # save file (written in the background)
+    image = ImageHandle.from_upload(selfie)
+    image.archive(path)
+
+    # embed now (before touching the DB) so face-match can reuse it
+    embeddings = embedding_service.selfie_embeddings(image)
 
     # update latest document
     doc = (
@@ -59,7 +50,9 @@ def capture_selfie(
     if not doc:
         raise HTTPException(404, "Aadhaar not uploaded first")
 
-    doc.selfie_path = path
+    doc.selfie_path = image.archived()
+    doc.selfie_hash = image.sha256
+    embedding_service.remember(db, image, embeddings)
 
     db.commit()
 
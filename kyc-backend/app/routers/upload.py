@@ -1,28 +1,27 @@
 import uuid
-import shutil
-import os
+import json
+import asyncio
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from ..database import SessionLocal
-from ..models import KYCDocument, OCRData
-from ..services.ocr_service import run_ocr
-
-from ..services.face_service import extract_aadhaar_face
+from ..database import get_db, AsyncSessionLocal
+from ..models import KYCDocument, KYCJob
+from .. import crud
+from ..services.ocr_pool import OCRPoolBusy
+from ..services import job_service, embedding_service
+from ..services.aadhaar_service import analyze_front
+from ..services.image_service import ImageHandle
+from ..instrumentation import get_logger
 
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
+logger = get_logger(__name__)
+
+JOB_POLL_INTERVAL = 0.5   # seconds between DB checks for long-poll / SSE
+JOB_MAX_WAIT = 30         # longest long-poll a client may ask for
 
 
-# -------------------------
-# DB dependency
-# -------------------------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
 # -------------------------
@@ -44,16 +43,15 @@ def validate_file(file: UploadFile):
 # -------------------------
 # Save file (UUID based)
 # -------------------------
-def save_file(file: UploadFile, folder: str):
-    os.makedirs(f"uploads/{folder}", exist_ok=True)
-
-    filename = f"{uuid.uuid4()}.jpg"
-    path = f"uploads/{folder}/{filename}"
-
-    with open(path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    return path
+def save_file(file: UploadFile, folder: str) -> ImageHandle:
+    """
+    Reads the upload into memory and archives it to disk in the
+    background. The returned handle (path in .path) is what the
+    rest of the request works on.
+    """
+    image = ImageHandle.from_upload(file)
+    image.archive(f"uploads/{folder}/{uuid.uuid4()}.jpg")
+    return image
 
 
 # -------------------------
@@ -64,6 +62,7 @@ def upload_aadhaar(
     user_id: int,
     front: UploadFile = File(...),
     back: UploadFile = File(...),
+    async_mode: bool = False,
     db: Session = Depends(get_db)
 ):
 
@@ -72,51 +71,64 @@ def upload_aadhaar(
     validate_file(back)
 
     # Save files
-    front_path = save_file(front, "aadhaar/front")
-    back_path = save_file(back, "aadhaar/back")
-    # 🔥 MODULE 6 integration
-    face_path = extract_aadhaar_face(front_path)
+    front_image = save_file(front, "aadhaar/front")
+    back_image = save_file(back, "aadhaar/back")
+
+    # -------------------------
+    # Async mode: queue face + OCR, return job id
+    # -------------------------
+    if async_mode:
+        doc = KYCDocument(
+            user_id=user_id,
+            aadhaar_front_path=front_image.archived(),
+            aadhaar_back_path=back_image.archived()
+        )
+        db.add(doc)
+        db.flush()
+
+        job = crud.create_job(db, user_id, doc.id, **job_service.new_lease())
+        db.commit()
+
+        try:
+            job_service.enqueue(job.id, front_image)
+        except job_service.JobQueueFull:
+            crud.update_job(db, job.id, status="FAILED", error="job queue full")
+            raise HTTPException(503, "Too many uploads in progress, please retry")
+
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job.id, "status": job.status}
+        )
+
+    # -------------------------
+    # Face (Module 6) + OCR (Module 3 + 4), in parallel
+    # -------------------------
+    try:
+        face, face_embeddings, ocr_result = analyze_front(front_image)
+    except OCRPoolBusy:
+        raise HTTPException(503, "OCR busy, please retry")
 
     # -------------------------
     # Save document paths
     # -------------------------
     doc = KYCDocument(
         user_id=user_id,
-        aadhaar_front_path=front_path,
-        aadhaar_back_path=back_path,
-        aadhaar_face_path=face_path  # filled in Module 6 later
+        aadhaar_front_path=front_image.archived(),
+        aadhaar_back_path=back_image.archived(),
+        aadhaar_face_path=face.archived() if face else None,
+        aadhaar_face_hash=face.sha256 if face else None
     )
-    print("Saved Aadhaar Face Path:", doc.aadhaar_face_path)
+    logger.info("aadhaar face saved", extra={"path": doc.aadhaar_face_path})
 
     db.add(doc)
-    # -------------------------
-    # OCR (Module 3 + 4)
-    # -------------------------
-    ocr_result = run_ocr(front_path)
 
+    if face:
+        embedding_service.remember(db, face, face_embeddings)
 
     # -------------------------
     # Save OCR data
     # -------------------------
-    existing = db.query(OCRData).filter(OCRData.user_id == user_id).first()
-
-    if existing:
-        existing.aadhaar_number = ocr_result["aadhaar_number"]
-        existing.name = ocr_result["name"]
-        existing.dob = ocr_result["dob"]
-        existing.gender = ocr_result["gender"]
-        existing.confidence_score = ocr_result["confidence"]
-    else:
-        ocr_data = OCRData(
-            user_id=user_id,
-            aadhaar_number=ocr_result["aadhaar_number"],
-            aadhaar_full=ocr_result["aadhaar_full"],      # full
-            name=ocr_result["name"],   # 🔥 added
-            dob=ocr_result["dob"],
-            gender=ocr_result["gender"],
-            confidence_score=ocr_result["confidence"]
-        )
-        db.add(ocr_data)
+    crud.upsert_ocr_data(db, user_id, ocr_result)
 
     db.commit()
 
@@ -124,3 +136,65 @@ def upload_aadhaar(
         "msg": "Aadhaar uploaded & OCR processed",
         "ocr_result": ocr_result
     }
+
+
+# -------------------------
+# Job status (poll / long-poll / SSE)
+# -------------------------
+async def load_job(job_id: str):
+    # fresh async session per poll, so every read sees the worker's commits
+    async with AsyncSessionLocal() as db:
+        job = await db.get(KYCJob, job_id)
+        return crud.job_to_dict(job) if job else None
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, wait: float = 0):
+    """
+    wait > 0 -> long-poll: hold the request (max JOB_MAX_WAIT seconds)
+    until the job finishes.
+    """
+    deadline = asyncio.get_running_loop().time() + min(wait, JOB_MAX_WAIT)
+
+    while True:
+        job = await load_job(job_id)
+
+        if not job:
+            raise HTTPException(404, "Job not found")
+
+        if job["status"] in crud.TERMINAL_JOB_STATUSES:
+            return job
+
+        if asyncio.get_running_loop().time() >= deadline:
+            return job
+
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-Sent Events: one event per status/stage change, closes when done.
+    """
+    job = await load_job(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+
+    async def stream():
+        last = None
+        while True:
+            job = await load_job(job_id)
+            if not job:
+                return
+
+            state = (job["status"], job["stage"])
+            if state != last:
+                last = state
+                yield f"data: {json.dumps(job)}\n\n"
+
+            if job["status"] in crud.TERMINAL_JOB_STATUSES:
+                return
+
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
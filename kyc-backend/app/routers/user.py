@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 from ..models import User
 from ..schemas import UserCreate
 from pydantic import BaseModel
@@ -8,12 +9,6 @@ from pydantic import BaseModel
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 # -------------------------
 # Login schema
@@ -23,8 +18,10 @@ class LoginRequest(BaseModel):
     mobile: str
 
 @router.post("/register")
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == user.email).first()
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = (await db.execute(
+        select(User).where(User.email == user.email)
+    )).scalars().first()
 
     # 🔥 If user exists → treat as login
     if existing:
@@ -37,8 +34,8 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     new_user = User(**user.dict())
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return {
         "user_id": new_user.id,
@@ -52,12 +49,14 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 # LOGIN ROUTE (🔥 ADD THIS)
 # -------------------------
 @router.post("/login")
-def login_user(data: LoginRequest, db: Session = Depends(get_db)):
+async def login_user(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
 
-    user = db.query(User).filter(
-        User.email == data.email,
-        User.mobile == data.mobile
-    ).first()
+    user = (await db.execute(
+        select(User).where(
+            User.email == data.email,
+            User.mobile == data.mobile
+        )
+    )).scalars().first()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -69,8 +68,8 @@ def login_user(data: LoginRequest, db: Session = Depends(get_db)):
 
 # ✅ ADD THIS ROUTE
 @router.get("/{user_id}")
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await db.get(User, user_id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -0,0 +1,58 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from .face_service import extract_aadhaar_face_image, aadhaar_embeddings
+from .image_service import ImageHandle
+from .ocr_pool import run_ocr
+from .ocr_service import empty_result
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+# face extraction runs here while OCR runs on the request thread
+AADHAAR_FACE_THREADS = int(os.getenv("AADHAAR_FACE_THREADS", "4"))
+
+face_executor = ThreadPoolExecutor(
+    max_workers=AADHAAR_FACE_THREADS,
+    thread_name_prefix="aadhaar-face"
+)
+
+
+# -------------------------
+# FRONT SIDE: FACE + OCR
+# -------------------------
+def face_with_embeddings(front):
+    """
+    Crops the card face and embeds its variants right away, so later
+    face-match calls only need the cached embeddings.
+    Returns (face_crop ImageHandle or None, embeddings or None).
+    """
+    face = extract_aadhaar_face_image(front)
+    if face is None:
+        return None, None
+    return face, aadhaar_embeddings(face)
+
+
+def analyze_front(front):
+    """
+    Decodes the front image once and runs face extraction and OCR on it
+    at the same time (onnxruntime and paddle both release the GIL).
+    Returns (face_crop ImageHandle or None, face embeddings, ocr_result).
+    """
+    front = ImageHandle.of(front)
+    if front.bgr is None:
+        return None, None, empty_result()
+
+    # copy_context: the face thread logs under the same request id
+    face_future = face_executor.submit(
+        contextvars.copy_context().run, face_with_embeddings, front
+    )
+
+    try:
+        ocr_result = run_ocr(front)
+    finally:
+        face, embeddings = face_future.result()
+
+    return face, embeddings, ocr_result
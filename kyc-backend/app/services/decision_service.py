@@ -0,0 +1,127 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import User, OCRData, FaceVerification, LivenessLogs
+from .matching_service import sort_score
+
+
+# -------------------------
+# CONFIG (decision matrix)
+# -------------------------
+OCR_MIN_CONFIDENCE = 0.75
+NAME_MIN_SCORE = 80          # on sort_score, stricter than /validate-name's verdict
+FACE_MATCH_SCORE = 0.50      # auto-verify
+FACE_REVIEW_SCORE = 0.30     # manual review band: [0.30, 0.50)
+
+
+# -------------------------
+# LOADING (one query for any number of users)
+# -------------------------
+def load_records(db: Session, user_ids) -> dict:
+    """
+    user_id -> (user, ocr, face, liveness); missing rows are None,
+    unknown users are left out.
+    """
+    rows = db.execute(
+        select(User, OCRData, FaceVerification, LivenessLogs)
+        .outerjoin(OCRData, OCRData.user_id == User.id)
+        .outerjoin(FaceVerification, FaceVerification.user_id == User.id)
+        .outerjoin(LivenessLogs, LivenessLogs.user_id == User.id)
+        .where(User.id.in_(list(user_ids)))
+    ).all()
+
+    return {row[0].id: tuple(row) for row in rows}
+
+
+# -------------------------
+# NAME MATCH (stored by /validate-name)
+# -------------------------
+def name_score(user: User, ocr: OCRData | None) -> float:
+    if ocr is None or not ocr.name:
+        return 0
+
+    # not validated yet (or OCR changed since): score once and keep it
+    if ocr.name_sort_score is None:
+        ocr.name_sort_score = sort_score(f"{user.first_name} {user.last_name}", ocr.name)
+
+    return ocr.name_sort_score
+
+
+# -------------------------
+# DECISION MATRIX
+# -------------------------
+def decide(user: User, ocr, face, liveness) -> dict:
+    """Pure decision for one user; sets user.kyc_status, caller commits."""
+
+    # A. OCR Status
+    ocr_passed = (
+        ocr is not None
+        and ocr.confidence_score is not None
+        and ocr.confidence_score >= OCR_MIN_CONFIDENCE
+    )
+
+    # B. Liveness Status
+    liveness_passed = (
+        liveness is not None
+        and liveness.status is True
+    )
+
+    # C. Name Match
+    score = name_score(user, ocr)
+    name_passed = score >= NAME_MIN_SCORE
+
+    # D. Face Match
+    face_score = 0.0
+    if face and face.similarity_score:
+        face_score = float(face.similarity_score)
+
+    final_status = "FAILED"
+    reason = "Unknown"
+
+    # CRITICAL: OCR, Liveness, and Name MUST pass for any approval
+    if ocr_passed and liveness_passed and name_passed:
+
+        # Scenario 1: Perfect Match (Auto-Verify)
+        if face_score >= FACE_MATCH_SCORE:
+            final_status = "VERIFIED"
+            reason = "Auto-Verified: High Match"
+
+        # Scenario 2: "Child Photo" Case (Manual Review)
+        elif FACE_REVIEW_SCORE <= face_score < FACE_MATCH_SCORE:
+            final_status = "MANUAL_REVIEW"
+            reason = "Flagged: Name matched but Face score low (Old Photo?)"
+
+        # Scenario 3: Face completely different
+        else:
+            final_status = "FAILED"
+            reason = "Face Mismatch"
+
+    else:
+        if not ocr_passed: reason = "OCR Failed"
+        elif not liveness_passed: reason = "Liveness Failed"
+        elif not name_passed: reason = "Name Mismatch"
+
+    user.kyc_status = final_status
+
+    return {
+        "user_id": user.id,
+        "final_status": final_status,
+        "reason": reason,
+        "metrics": {
+            "ocr_passed": ocr_passed,
+            "liveness_passed": liveness_passed,
+            "name_score": score,
+            "face_score": face_score
+        }
+    }
+
+
+def decide_users(db: Session, user_ids) -> dict:
+    """
+    Decides every user in one query + one commit.
+    Returns user_id -> decision (unknown users are absent).
+    """
+    records = load_records(db, user_ids)
+    decisions = {uid: decide(*records[uid]) for uid in records}
+    db.commit()
+    return decisions
@@ -0,0 +1,87 @@
+from sqlalchemy.orm import Session
+
+from .. import crud
+from .face_service import (
+    EMBEDDING_VERSION,
+    aadhaar_embeddings,
+    get_embedding,
+    score_embeddings,
+    variant_names
+)
+from .image_service import ImageHandle
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+SELFIE_VARIANT = "selfie"
+
+
+# -------------------------
+# COMPUTE
+# -------------------------
+def selfie_embeddings(selfie):
+    img = ImageHandle.of(selfie).bgr
+    if img is None:
+        return None
+    return {SELFIE_VARIANT: get_embedding(img)}
+
+
+# -------------------------
+# CACHE (keyed by file sha256 + EMBEDDING_VERSION)
+# -------------------------
+def remember(db: Session, image: ImageHandle, embeddings: dict | None):
+    if embeddings:
+        crud.save_embeddings(db, image.sha256, EMBEDDING_VERSION, embeddings)
+
+
+def cached(db: Session, image, variants, compute, file_hash: str | None = None):
+    """
+    Returns {variant: embedding} from the DB if every variant is stored,
+    otherwise computes, stores and returns it. None if the image is missing.
+    With a known `file_hash` a cache hit never touches the file.
+    """
+    image = ImageHandle.of(image)
+
+    if file_hash:
+        stored = crud.get_embeddings(db, file_hash, EMBEDDING_VERSION)
+        if all(v in stored for v in variants):
+            return {v: stored[v] for v in variants}
+
+    try:
+        file_hash = image.sha256
+    except OSError:
+        return None
+
+    stored = crud.get_embeddings(db, file_hash, EMBEDDING_VERSION)
+    if all(v in stored for v in variants):
+        return {v: stored[v] for v in variants}
+
+    # end the read transaction so the pooled connection is free while
+    # the model runs
+    db.commit()
+    embeddings = compute(image)
+    remember(db, image, embeddings)
+    return embeddings
+
+
+def compare_faces_cached(db: Session, aadhaar_face, selfie,
+                         aadhaar_hash: str | None = None, selfie_hash: str | None = None):
+    """
+    Same result as face_service.compare_faces, but embeddings come from
+    the cache when the files were seen before (then it's only dot products).
+    Pass the stored hashes to skip reading and hashing the files.
+    """
+    selfie_embs = cached(db, selfie, [SELFIE_VARIANT], selfie_embeddings, selfie_hash)
+    if selfie_embs is None:
+        return {"match": False, "error": "Selfie not found"}
+
+    emb_selfie = selfie_embs[SELFIE_VARIANT]
+    if emb_selfie is None:
+        return {"similarity": 0.0, "match": False, "error": "No face in Selfie"}
+
+    aadhaar_embs = cached(db, aadhaar_face, variant_names(), aadhaar_embeddings, aadhaar_hash)
+    if aadhaar_embs is None:
+        return {"match": False, "error": "Aadhaar face not found"}
+
+    return score_embeddings(aadhaar_embs, emb_selfie)
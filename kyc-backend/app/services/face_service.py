@@ -1,25 +1,129 @@
 import cv2
 import os
 import uuid
+import threading
 import numpy as np
 from insightface.app import FaceAnalysis
+from insightface.utils import face_align
+
+from .image_service import ImageHandle
+from ..instrumentation import get_logger, span
+
+logger = get_logger(__name__)
+
+# -------------------------------------------
+# CONFIG (detector resolution)
+# -------------------------------------------
+# SCRFD input sizes to pick from, by image size: the smallest one that
+# fits the image's longer side, else the largest. A 200px crop runs at
+# 320 instead of 640. The largest is also the prepared default.
+FACE_DET_SIZES = sorted(
+    int(s) for s in os.getenv("FACE_DET_SIZES", "320,480,640").split(",") if s.strip()
+)
+
+# Cards are scaled towards this width before face detection (only up,
+# at most 2x), instead of always 2x whatever the photo size.
+FACE_CARD_TARGET_WIDTH = int(os.getenv("FACE_CARD_TARGET_WIDTH", "1280"))
+FACE_CARD_MAX_SCALE = 2.0
+
+FACE_MODEL_NAME = "buffalo_l"
+
+# Stored embeddings are only reused under the same model and detector
+# settings. Bump the last part when the detect / align / embed path changes.
+EMBEDDING_VERSION = f"{FACE_MODEL_NAME}:det{','.join(map(str, FACE_DET_SIZES))}:2"
 
 # -------------------------------------------
 # 1. Initialize InsightFace (Large Model)
 # -------------------------------------------
 # ensure we use 'buffalo_l' (Large) if available, it gives higher scores than 'buffalo_s'
 # If you only have 'buffalo_s', this code still works but 'l' is better.
-face_app = FaceAnalysis(name='buffalo_l', providers=["CPUExecutionProvider"])
-face_app.prepare(ctx_id=0, det_thresh=0.3, det_size=(640, 640))
+# Built on first use (or at startup by model_service), not at import.
+_face_app = None
+_face_app_lock = threading.Lock()
+
+
+def get_face_app():
+    global _face_app
+    if _face_app is None:
+        with _face_app_lock:
+            if _face_app is None:
+                # only SCRFD + ArcFace are used; skip loading the landmark
+                # and gender-age models
+                face_app = FaceAnalysis(
+                    name=FACE_MODEL_NAME,
+                    allowed_modules=['detection', 'recognition'],
+                    providers=["CPUExecutionProvider"]
+                )
+                size = FACE_DET_SIZES[-1]
+                face_app.prepare(ctx_id=0, det_thresh=0.3, det_size=(size, size))
+                _face_app = face_app
+    return _face_app
 
 # -------------------------------------------
 # 2. Image Processing Variants
 # -------------------------------------------
-def process_variants(image_path):
+# Denoise step behind the "denoised" / "enhanced" variants:
+#   nlmeans            -> fastNlMeansDenoisingColored on the full crop (slowest)
+#   nlmeans_downscaled -> same filter on a half-size crop, scaled back up
+#   bilateral          -> edge-preserving bilateral filter
+#   median             -> 5x5 median, removes the printing dots
+#   pyramid            -> Gaussian pyrDown + pyrUp
+# Compare them with: python -m benchmarks.bench_denoise
+DENOISE_BACKENDS = ["nlmeans", "nlmeans_downscaled", "bilateral", "median", "pyramid"]
+FACE_DENOISE_BACKEND = os.getenv("FACE_DENOISE_BACKEND", "nlmeans")
+
+
+def denoise(img, backend=None):
+    backend = backend or FACE_DENOISE_BACKEND
+
+    if backend == "nlmeans":
+        return cv2.fastNlMeansDenoisingColored(img, None, 10, 10, 7, 21)
+
+    if backend == "nlmeans_downscaled":
+        h, w = img.shape[:2]
+        small = cv2.resize(img, (w // 2, h // 2), interpolation=cv2.INTER_AREA)
+        small = cv2.fastNlMeansDenoisingColored(small, None, 10, 10, 7, 21)
+        return cv2.resize(small, (w, h), interpolation=cv2.INTER_CUBIC)
+
+    if backend == "bilateral":
+        return cv2.bilateralFilter(img, 9, 75, 75)
+
+    if backend == "median":
+        return cv2.medianBlur(img, 5)
+
+    if backend == "pyramid":
+        h, w = img.shape[:2]
+        return cv2.pyrUp(cv2.pyrDown(img), dstsize=(w, h))
+
+    raise ValueError(f"Unknown denoise backend: {backend}")
+
+
+def enhance(img):
+    """CLAHE on the L channel (LAB), for low-light / washed out crops."""
+    lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
+    l, a, b = cv2.split(lab)
+    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+    cl = clahe.apply(l)
+    limg = cv2.merge((cl, a, b))
+    return cv2.cvtColor(limg, cv2.COLOR_LAB2BGR)
+
+
+def variant_names(backend=None):
+    """
+    Names of process_variants() outputs, in order (also embedding cache keys).
+    Non-default backends get their own names so cached embeddings never mix.
+    """
+    backend = backend or FACE_DENOISE_BACKEND
+    if backend == "nlmeans":
+        return ["original", "denoised", "enhanced"]
+    return ["original", f"denoised:{backend}", f"enhanced:{backend}"]
+
+
+def process_variants(image, backend=None):
     """
     Generates 3 versions of the ID card face to maximize match probability.
     """
-    img = cv2.imread(image_path)
+    img = ImageHandle.of(image).bgr
     if img is None: return []
 
     variants = []
@@ -29,68 +133,137 @@ def process_variants(image_path):
 
     # Variant 2: Denoised (Best for SCANS with printing dots)
     # This smooths out the "mesh" pattern on scanned IDs
-    denoised = cv2.fastNlMeansDenoisingColored(img, None, 10, 10, 7, 21)
+    denoised = denoise(img, backend)
     variants.append(denoised)
 
     # Variant 3: Enhanced (Best for low-light/washed out IDs)
-    lab = cv2.cvtColor(denoised, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
-    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-    cl = clahe.apply(l)
-    limg = cv2.merge((cl, a, b))
-    enhanced = cv2.cvtColor(limg, cv2.COLOR_LAB2BGR)
-    variants.append(enhanced)
+    variants.append(enhance(denoised))
 
     return variants
 
 # -------------------------------------------
 # 3. Robust Embedding
 # -------------------------------------------
-def get_embedding(img_data):
-    # Try normal detection
-    faces = face_app.get(img_data)
-    
+def det_size_for(img) -> int:
+    longest = max(img.shape[:2])
+    for size in FACE_DET_SIZES:
+        if size >= longest:
+            return size
+    return FACE_DET_SIZES[-1]
+
+
+def detect_faces(img):
+    """
+    SCRFD only, at the input size matching the image (face_app.get() would
+    also run the landmark / gender-age models we never use).
+    Returns (bboxes, kpss) in image pixels.
+    """
+    det = get_face_app().det_model
+    size = det_size_for(img)
+
+    with span(f"face_detect:{size}"):
+        bboxes, kpss = det.detect(img, input_size=(size, size), max_num=0, metric='default')
+
+    # nothing at a reduced size: one more try at the full one
+    if len(bboxes) == 0 and size < FACE_DET_SIZES[-1]:
+        size = FACE_DET_SIZES[-1]
+        with span(f"face_detect:{size}"):
+            bboxes, kpss = det.detect(img, input_size=(size, size), max_num=0, metric='default')
+
+    return bboxes, kpss
+
+
+def largest(bboxes):
+    areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+    return int(np.argmax(areas))
+
+
+def detect_largest(img_data):
+    """
+    Keypoints (5x2) of the largest face, or None.
+    """
+    scale = 1.0
+    bboxes, kpss = detect_faces(img_data)
+
     # If failed (small crop), upsample and retry
-    if not faces:
+    if len(bboxes) == 0:
         h, w = img_data.shape[:2]
         if h < 300:
             scale = 2.0
             img_large = cv2.resize(img_data, None, fx=scale, fy=scale)
-            faces = face_app.get(img_large)
+            with span("face_detect_retry"):
+                bboxes, kpss = detect_faces(img_large)
 
-    if not faces:
+    if len(bboxes) == 0 or kpss is None:
         return None
 
-    # Return embedding of the largest face
-    faces.sort(key=lambda x: (x.bbox[2]-x.bbox[0]) * (x.bbox[3]-x.bbox[1]), reverse=True)
-    return faces[0].normed_embedding
+    return kpss[largest(bboxes)] / scale
+
+
+def embed_aligned(images, kps):
+    """
+    Aligns every image with the SAME keypoints and runs ArcFace once
+    on the whole batch. Returns normed embeddings, shape (N, 512).
+    """
+    rec = get_face_app().models["recognition"]
+    chips = [
+        face_align.norm_crop(img, landmark=kps, image_size=rec.input_size[0])
+        for img in images
+    ]
+    with span("face_recognize", batch=len(chips)):
+        feats = rec.get_feat(chips)
+    return feats / np.linalg.norm(feats, axis=1, keepdims=True)
+
+
+def get_embedding(img_data):
+    with span("embedding"):
+        kps = detect_largest(img_data)
+        if kps is None:
+            return None
+
+        # Return embedding of the largest face
+        return embed_aligned([img_data], kps)[0]
 
 # -------------------------------------------
 # 4. Compare Faces (Ensemble Logic)
 # -------------------------------------------
-def compare_faces(aadhaar_face_path: str, selfie_path: str):
-    # 1. Get Selfie Embedding (Reference)
-    img_selfie = cv2.imread(selfie_path)
-    if img_selfie is None: return {"match": False, "error": "Selfie not found"}
-    
-    emb_selfie = get_embedding(img_selfie)
-    if emb_selfie is None:
-        return {"similarity": 0.0, "match": False, "error": "No face in Selfie"}
+def aadhaar_embeddings(aadhaar_face, backend=None):
+    """
+    {variant_name: normed embedding or None}, or None if image is missing.
 
-    # 2. Get Aadhaar Variants
-    aadhaar_variants = process_variants(aadhaar_face_path)
+    The variants are pixel-aligned copies of one crop, so the face is
+    detected once (original first, other variants as fallback) and the
+    3 aligned chips go through ArcFace as a single batch.
+    """
+    with span("face_variants"):
+        aadhaar_variants = process_variants(aadhaar_face, backend)
     if not aadhaar_variants:
-        return {"match": False, "error": "Aadhaar face not found"}
+        return None
+
+    names = variant_names(backend)
+
+    kps = None
+    for img_variant in aadhaar_variants:
+        kps = detect_largest(img_variant)
+        if kps is not None:
+            break
+
+    if kps is None:
+        return {name: None for name in names}
+
+    with span("embedding_aadhaar"):
+        feats = embed_aligned(aadhaar_variants, kps)
+    return dict(zip(names, feats))
 
+
+def score_embeddings(aadhaar_embs: dict, emb_selfie):
     best_score = 0.0
 
     # 3. Compare EACH variant against Selfie and pick the Winner
-    for i, img_variant in enumerate(aadhaar_variants):
-        emb_id = get_embedding(img_variant)
-        
+    for i, emb_id in enumerate(aadhaar_embs.values()):
         if emb_id is not None:
             score = float(np.dot(emb_id, emb_selfie))
-            print(f"DEBUG: Variant {i+1} Score: {score:.3f}") # Debug log
+            logger.debug("variant score", extra={"variant": i + 1, "score": round(score, 3)})
             
             if score > best_score:
                 best_score = score
@@ -107,30 +280,58 @@ def compare_faces(aadhaar_face_path: str, selfie_path: str):
         "match": final_score >= 0.50 # Keep threshold realistic (0.50 is standard for ID)
     }
 
+
+def compare_faces(aadhaar_face, selfie):
+    # paths, ndarrays or ImageHandles
+    # 1. Get Selfie Embedding (Reference)
+    img_selfie = ImageHandle.of(selfie).bgr
+    if img_selfie is None: return {"match": False, "error": "Selfie not found"}
+    
+    emb_selfie = get_embedding(img_selfie)
+    if emb_selfie is None:
+        return {"similarity": 0.0, "match": False, "error": "No face in Selfie"}
+
+    # 2. Get Aadhaar Variants
+    aadhaar_embs = aadhaar_embeddings(aadhaar_face)
+    if aadhaar_embs is None:
+        return {"match": False, "error": "Aadhaar face not found"}
+
+    return score_embeddings(aadhaar_embs, emb_selfie)
+
 # -------------------------------------------
 # 5. Extract & Save Aadhaar Face
 # -------------------------------------------
-def extract_aadhaar_face(aadhaar_front_path: str) -> str | None:
-    img = cv2.imread(aadhaar_front_path)
-    if img is None: return None
+def extract_aadhaar_face_image(aadhaar_front) -> ImageHandle | None:
+    """
+    Crops the card photo. Accepts a path, ndarray or ImageHandle and
+    returns the crop as an ImageHandle (kept in memory, archived async).
+    """
+    with span("face_extract"):
+        return _extract_aadhaar_face_image(aadhaar_front)
+
+
+def card_scale(img) -> float:
+    # small card photos are enlarged for detection, big ones left alone
+    return min(FACE_CARD_MAX_SCALE, max(1.0, FACE_CARD_TARGET_WIDTH / img.shape[1]))
 
-    # Upscale specifically for Detection
-    img_large = cv2.resize(img, None, fx=2.0, fy=2.0)
-    
-    faces = face_app.get(img_large)
+
+def _extract_aadhaar_face_image(aadhaar_front) -> ImageHandle | None:
+    front = ImageHandle.of(aadhaar_front)
+    if front.bgr is None: return None
+
+    # Upscale specifically for Detection (adaptive, by card width)
+    scale = card_scale(front.bgr)
+    img_large = front.upscaled(scale)
+
+    bboxes, _ = detect_faces(img_large)
 
     # Fallback Enhancement for Detection
-    if not faces:
-        lab = cv2.cvtColor(img_large, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        cl = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8)).apply(l)
-        enhanced = cv2.cvtColor(cv2.merge((cl, a, b)), cv2.COLOR_LAB2BGR)
-        faces = face_app.get(enhanced)
+    if len(bboxes) == 0:
+        bboxes, _ = detect_faces(front.clahe(scale))
 
-    if not faces: return None
+    if len(bboxes) == 0: return None
 
-    face = max(faces, key=lambda x: (x.bbox[2]-x.bbox[0]) * (x.bbox[3]-x.bbox[1]))
-    x1, y1, x2, y2 = map(int, face.bbox)
+    x1, y1, x2, y2 = map(int, bboxes[largest(bboxes)][:4])
 
     # 🔥 CRITICAL: Add 40% Margin
     # Bigger context = Better alignment = Higher Score
@@ -143,10 +344,12 @@ def extract_aadhaar_face(aadhaar_front_path: str) -> str | None:
     x2 = min(w, x2 + margin_x)
     y2 = min(h, y2 + margin_y)
 
-    crop = img_large[y1:y2, x1:x2]
+    crop = ImageHandle(bgr=img_large[y1:y2, x1:x2].copy())
+    crop.archive(f"uploads/aadhaar/face/{uuid.uuid4()}.jpg")
 
-    os.makedirs("uploads/aadhaar/face", exist_ok=True)
-    save_path = f"uploads/aadhaar/face/{uuid.uuid4()}.jpg"
-    cv2.imwrite(save_path, crop)
-    
-    return save_path
\ No newline at end of file
+    return crop
+
+
+def extract_aadhaar_face(aadhaar_front) -> str | None:
+    crop = extract_aadhaar_face_image(aadhaar_front)
+    return crop.path if crop else None
@@ -0,0 +1,154 @@
+import os
+import uuid
+import hashlib
+import threading
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from ..instrumentation import span
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+# disk is only for archival, writes happen off the request thread
+IMAGE_ARCHIVE_THREADS = int(os.getenv("IMAGE_ARCHIVE_THREADS", "2"))
+# how long a request waits for its file before committing the path
+IMAGE_ARCHIVE_TIMEOUT = float(os.getenv("IMAGE_ARCHIVE_TIMEOUT", "30"))
+
+archive_executor = ThreadPoolExecutor(
+    max_workers=IMAGE_ARCHIVE_THREADS,
+    thread_name_prefix="image-archive"
+)
+
+
+def write_file(path: str, data: bytes):
+    with span("file_save"):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write aside + rename: readers see the whole file or no file
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    return path
+
+
+# -------------------------
+# IMAGE HANDLE
+# -------------------------
+class ImageHandle:
+    """
+    One image for the whole request: decoded once, derived forms
+    (gray / upscaled / CLAHE) computed lazily and cached.
+    """
+
+    def __init__(self, data: bytes | None = None, bgr: np.ndarray | None = None,
+                 path: str | None = None):
+        self.data = data        # original encoded bytes (kept for archival)
+        self.path = path        # where it lives / will live on disk
+        self._bgr = bgr
+        self._cache = {}
+        self._lock = threading.RLock()
+        self._archive = None     # future of the pending disk write
+
+    # ---- constructors ----
+    @classmethod
+    def from_upload(cls, file):
+        with span("upload_read"):
+            file.file.seek(0)
+            return cls(data=file.file.read())
+
+    @classmethod
+    def from_path(cls, path: str):
+        return cls(path=path)
+
+    @classmethod
+    def of(cls, image):
+        """Wraps a path, a BGR ndarray or an existing handle."""
+        if isinstance(image, ImageHandle):
+            return image
+        if isinstance(image, str):
+            return cls.from_path(image)
+        return cls(bgr=image)
+
+    # ---- decoded forms ----
+    @property
+    def bgr(self):
+        if self._bgr is None:
+            with self._lock:
+                if self._bgr is None:
+                    if self.data is not None:
+                        buf = np.frombuffer(self.data, np.uint8)
+                        self._bgr = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+                    elif self.path is not None:
+                        self._bgr = cv2.imread(self.path)
+        return self._bgr
+
+    def derived(self, key, build):
+        if key not in self._cache:
+            with self._lock:
+                if key not in self._cache:
+                    self._cache[key] = build()
+        return self._cache[key]
+
+    @property
+    def gray(self):
+        return self.derived("gray", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY))
+
+    def upscaled(self, scale: float):
+        if scale == 1.0:
+            return self.bgr
+        return self.derived(
+            ("upscaled", scale),
+            lambda: cv2.resize(self.bgr, None, fx=scale, fy=scale)
+        )
+
+    def clahe(self, scale: float = 1.0):
+        def build():
+            lab = cv2.cvtColor(self.upscaled(scale), cv2.COLOR_BGR2LAB)
+            l, a, b = cv2.split(lab)
+            cl = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8)).apply(l)
+            return cv2.cvtColor(cv2.merge((cl, a, b)), cv2.COLOR_LAB2BGR)
+
+        return self.derived(("clahe", scale), build)
+
+    # ---- archival ----
+    def encoded(self) -> bytes:
+        if self.data is None:
+            if self.path is not None and self._bgr is None:
+                # same bytes as on disk, so hashes match the archived file
+                with open(self.path, "rb") as f:
+                    self.data = f.read()
+            else:
+                ok, buf = cv2.imencode(".jpg", self.bgr)
+                self.data = buf.tobytes() if ok else b""
+        return self.data
+
+    @property
+    def sha256(self) -> str:
+        return self.derived("sha256", lambda: hashlib.sha256(self.encoded()).hexdigest())
+
+    def archive(self, path: str):
+        """
+        Schedules the write of the original bytes to `path`.
+        Returns a future; the handle keeps working from memory meanwhile.
+        """
+        self.path = path
+        self._archive = archive_executor.submit(write_file, path, self.encoded())
+        return self._archive
+
+    def archived(self, timeout: float = IMAGE_ARCHIVE_TIMEOUT) -> str | None:
+        """
+        Waits for the pending write and returns the path. Call before
+        committing the path, so no row points at a file that isn't there.
+        """
+        if self._archive is not None:
+            self._archive.result(timeout=timeout)
+        return self.path
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import uuid
+import queue
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, update
+
+from ..database import session_scope
+from ..instrumentation import get_logger, request_id_var
+from ..models import KYCDocument, KYCJob
+from .. import crud
+from . import embedding_service
+from .aadhaar_service import face_with_embeddings
+from .image_service import ImageHandle
+from .ocr_pool import run_ocr
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+JOB_FACE_WORKERS = int(os.getenv("JOB_FACE_WORKERS", "1"))
+JOB_OCR_WORKERS = int(os.getenv("JOB_OCR_WORKERS", "2"))
+
+# items hold the decoded upload (+ its cached copies): bounded, so a spike
+# gets 503s instead of growing memory
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+
+# queues live in memory, so each job carries its owner process and a lease
+# the owner keeps renewing; jobs whose lease ran out (owner died) are put
+# back by whichever process sees them first (see resume_unfinished)
+JOB_RESUME_ON_START = os.getenv("JOB_RESUME_ON_START", "true").lower() == "true"
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_HEARTBEAT_SECONDS = JOB_LEASE_SECONDS / 3
+
+# unique per process, also across pods and uvicorn workers
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+# (job_id, front ImageHandle or None) flows: face_queue -> ocr_queue -> DONE
+face_queue = queue.Queue(maxsize=JOB_QUEUE_SIZE)
+ocr_queue = queue.Queue(maxsize=JOB_QUEUE_SIZE)
+
+logger = get_logger(__name__)
+
+_started = False
+_start_lock = threading.Lock()
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class LeaseLost(Exception):
+    """The job was resumed by another process; this one must drop it."""
+
+
+# -------------------------
+# LEASES
+# -------------------------
+def new_lease() -> dict:
+    return {
+        "owner": WORKER_ID,
+        "lease_until": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)
+    }
+
+
+def owned_job(db, job_id: str):
+    job = crud.get_job(db, job_id)
+    if job is None or job.owner != WORKER_ID:
+        raise LeaseLost(job_id)
+    return job
+
+
+def renew_leases():
+    """One UPDATE for every unfinished job this process holds."""
+    with session_scope() as db:
+        db.execute(
+            update(KYCJob)
+            .where(KYCJob.owner == WORKER_ID, KYCJob.status.in_(["QUEUED", "RUNNING"]))
+            .values(lease_until=new_lease()["lease_until"])
+        )
+        db.commit()
+
+
+def keep_leases():
+    """Lease thread: renew ours, then pick up jobs whose owner went away."""
+    while True:
+        try:
+            renew_leases()
+        except Exception:
+            logger.exception("could not renew job leases")
+        resume_unfinished()
+        time.sleep(JOB_HEARTBEAT_SECONDS)
+
+
+# -------------------------
+# STAGES
+# -------------------------
+def load_front(db, document_id: int, front):
+    # the upload request hands over the decoded image; disk is the fallback
+    if front is not None:
+        return front
+    return ImageHandle.from_path(db.get(KYCDocument, document_id).aadhaar_front_path)
+
+
+def face_stage(job_id: str, front):
+    # keep the DB session closed while the model runs
+    with session_scope() as db:
+        job = owned_job(db, job_id)
+        crud.update_job(db, job_id, status="RUNNING", stage="face")
+        doc_id = job.document_id
+        front = load_front(db, doc_id, front)
+
+    face, embeddings = face_with_embeddings(front)
+    face_path = face.archived() if face else None
+    logger.info("aadhaar face saved", extra={"path": face_path})
+
+    with session_scope() as db:
+        owned_job(db, job_id)
+        doc = db.get(KYCDocument, doc_id)
+        doc.aadhaar_face_path = face_path
+        doc.aadhaar_face_hash = face.sha256 if face else None
+        if face:
+            embedding_service.remember(db, face, embeddings)
+        crud.update_job(db, job_id, stage="ocr")
+
+
+def ocr_stage(job_id: str, front):
+    with session_scope() as db:
+        job = owned_job(db, job_id)
+        user_id = job.user_id
+        front = load_front(db, job.document_id, front)
+
+    ocr_result = run_ocr(front)
+
+    with session_scope() as db:
+        owned_job(db, job_id)
+        crud.upsert_ocr_data(db, user_id, ocr_result)
+        crud.update_job(
+            db, job_id,
+            status="DONE",
+            result=json.dumps(ocr_result, default=float)
+        )
+
+
+# -------------------------
+# WORKERS
+# -------------------------
+def worker(source: queue.Queue, stage, target: queue.Queue | None):
+    while True:
+        job_id, front = source.get()
+        # logs of a job carry its id, like a request's
+        request_id_var.set(job_id)
+        try:
+            stage(job_id, front)
+            if target is not None:
+                target.put((job_id, front))
+        except LeaseLost:
+            # another process resumed it (our lease lapsed): it owns the job now
+            logger.warning("job lease lost, dropping it", extra={"job_id": job_id})
+        except Exception as e:
+            logger.exception("job stage failed", extra={"job_id": job_id})
+            mark_failed(job_id, e)
+        finally:
+            source.task_done()
+
+
+def mark_failed(job_id: str, error: Exception):
+    # must never raise: an exception here would end the worker thread
+    try:
+        with session_scope() as db:
+            crud.update_job(db, job_id, status="FAILED", error=str(error))
+    except Exception:
+        logger.exception("could not mark job failed", extra={"job_id": job_id})
+
+
+def start_workers():
+    global _started
+    with _start_lock:
+        if _started:
+            return
+
+        for _ in range(JOB_FACE_WORKERS):
+            threading.Thread(
+                target=worker, args=(face_queue, face_stage, ocr_queue), daemon=True
+            ).start()
+
+        for _ in range(JOB_OCR_WORKERS):
+            threading.Thread(
+                target=worker, args=(ocr_queue, ocr_stage, None), daemon=True
+            ).start()
+
+        _started = True
+
+
+def enqueue(job_id: str, front: ImageHandle | None = None):
+    """Raises JobQueueFull instead of waiting for room."""
+    start_workers()
+    try:
+        face_queue.put_nowait((job_id, front))
+    except queue.Full:
+        raise JobQueueFull()
+
+
+def release(job_ids):
+    """Gives up jobs we claimed but had no room for; the next sweep retries."""
+    with session_scope() as db:
+        db.execute(
+            update(KYCJob)
+            .where(KYCJob.id.in_(job_ids), KYCJob.owner == WORKER_ID)
+            .values(owner=None, lease_until=datetime.utcnow())
+        )
+        db.commit()
+
+
+def resume_unfinished():
+    """
+    Re-enqueues QUEUED / RUNNING jobs whose lease expired: their owner
+    stopped renewing it, so they were only in a dead process' memory.
+    Jobs of live processes (siblings during a deploy or scale-up) keep a
+    fresh lease and are left alone. Jobs already in the OCR stage skip
+    the face stage. Rows are claimed with SKIP LOCKED and a new owner, so
+    two processes never take the same job.
+    """
+    if not JOB_RESUME_ON_START:
+        return
+
+    # claim no more than the queues have room for
+    room = JOB_QUEUE_SIZE - max(face_queue.qsize(), ocr_queue.qsize())
+    if room <= 0:
+        return
+
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=JOB_LEASE_SECONDS)
+    try:
+        with session_scope() as db:
+            jobs = (
+                db.query(KYCJob)
+                .filter(
+                    KYCJob.status.in_(["QUEUED", "RUNNING"]),
+                    or_(
+                        KYCJob.lease_until < now,
+                        # rows from before leases: idle for a whole lease
+                        and_(KYCJob.lease_until.is_(None), KYCJob.updated_at < stale)
+                    )
+                )
+                .with_for_update(skip_locked=True)
+                .limit(room)
+                .all()
+            )
+            resumed = [(job.id, job.stage) for job in jobs]
+            lease = new_lease()
+            for job in jobs:
+                job.status = "QUEUED"
+                job.owner = lease["owner"]
+                job.lease_until = lease["lease_until"]
+            db.commit()
+    except Exception:
+        logger.exception("could not resume unfinished jobs")
+        return
+
+    if not resumed:
+        return
+
+    start_workers()
+    overflow = []
+    for job_id, stage in resumed:
+        try:
+            (ocr_queue if stage == "ocr" else face_queue).put_nowait((job_id, None))
+        except queue.Full:
+            overflow.append(job_id)
+
+    if overflow:
+        try:
+            release(overflow)
+        except Exception:
+            # the leases just run out instead
+            logger.exception("could not release jobs")
+    logger.info("resumed unfinished jobs", extra={"jobs": len(resumed) - len(overflow)})
@@ -1,87 +1,433 @@
+import os
 import cv2
+import time
+import queue
+import threading
+from contextlib import contextmanager
 import numpy as np
 import mediapipe as mp
 
+from ..instrumentation import span
+
 mp_face_mesh = mp.solutions.face_mesh
 
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1,
-    refine_landmarks=True
-)
+# -------------------------
+# CONFIG
+# -------------------------
+LIVENESS_POOL_SIZE = int(os.getenv("LIVENESS_POOL_SIZE", "4"))
+LIVENESS_POOL_TIMEOUT = float(os.getenv("LIVENESS_POOL_TIMEOUT", "30"))
+
+# Frames are shrunk to this width before FaceMesh (0 = full resolution).
+# Landmarks are mapped back to full-frame pixels, so HEAD_TURN_PX keeps
+# meaning "pixels of the uploaded frame" whatever size FaceMesh sees.
+LIVENESS_FRAME_WIDTH = int(os.getenv("LIVENESS_FRAME_WIDTH", "640"))
+
+# After the first detection only a box around the face is processed.
+# Margin is in units of the eye-to-nose span, on each side.
+LIVENESS_ROI = os.getenv("LIVENESS_ROI", "true").lower() == "true"
+LIVENESS_ROI_MARGIN = float(os.getenv("LIVENESS_ROI_MARGIN", "1.0"))
+
+
+class LivenessBusy(Exception):
+    pass
+
+
+# -------------------------
+# FACEMESH POOL
+# -------------------------
+class FaceMeshPool:
+    """
+    FaceMesh keeps tracking state between frames and is not safe to share
+    across threads. Each liveness call checks out its own instance, which
+    is reset before it goes back, so no state leaks between users.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+        # contention counters (read by pool_stats / metrics)
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.in_use = 0
+
+    def _create(self):
+        return mp_face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=True
+        )
+
+    def _try_create(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        return self._create()
+
+    def fill(self):
+        """Creates every instance up front (used at startup)."""
+        while True:
+            mesh = self._try_create()
+            if mesh is None:
+                return
+            self._idle.put(mesh)
+
+    def acquire(self, timeout: float):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        mesh = self._try_create()
+        if mesh is not None:
+            return mesh
+
+        # all instances busy -> wait for one
+        start = time.perf_counter()
+        with self._lock:
+            self.waits += 1
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise LivenessBusy("No FaceMesh instance free")
+        finally:
+            with self._lock:
+                self.wait_seconds += time.perf_counter() - start
+
+    def checkout(self, timeout: float = LIVENESS_POOL_TIMEOUT):
+        mesh = self.acquire(timeout)
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+        return mesh
+
+    def checkin(self, mesh):
+        mesh.reset()
+        with self._lock:
+            self.in_use -= 1
+        self._idle.put(mesh)
+
+    @contextmanager
+    def session(self, timeout: float = LIVENESS_POOL_TIMEOUT):
+        mesh = self.checkout(timeout)
+        try:
+            yield mesh
+        finally:
+            self.checkin(mesh)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "timeouts": self.timeouts
+            }
+
+
+face_mesh_pool = FaceMeshPool(LIVENESS_POOL_SIZE)
 
 LEFT_EYE = [33, 160, 158, 133, 153, 144]
 RIGHT_EYE = [362, 385, 387, 263, 373, 380]
+NOSE = 1
+
+EAR_THRESHOLD = 0.20   # below this the eyes count as closed
+HEAD_TURN_PX = 25      # nose x movement needed for a head turn
+
+# Only these 13 of FaceMesh's 478 landmarks are ever used. They live in a
+# fixed (13, 2) array: rows 0-5 left eye, 6-11 right eye, 12 nose.
+POINT_INDICES = LEFT_EYE + RIGHT_EYE + [NOSE]
+EYE_ROWS = list(range(12))
+NOSE_ROW = 12
+ROI_ROWS = [0, 9, NOSE_ROW]   # outer eye corners (33, 263) + nose
+
+
+def new_points(frames: int | None = None):
+    shape = (len(POINT_INDICES), 2) if frames is None else (frames, len(POINT_INDICES), 2)
+    return np.zeros(shape, dtype=np.float32)
+
+
+def fill_points(landmarks, rows, w, h, out, offset=(0, 0)):
+    """
+    Writes pixel coords of the requested rows into `out` (13, 2) in place.
+    w, h: size of the region FaceMesh saw, offset: its top-left corner.
+    Truncated to whole pixels like the old int(lm.x * w).
+    """
+    for row in rows:
+        lm = landmarks[POINT_INDICES[row]]
+        out[row, 0] = lm.x
+        out[row, 1] = lm.y
+
+    out[rows] = np.trunc(out[rows] * (w, h) + offset)
+    return out
+
+
+def ear_batch(points):
+    """
+    Mean EAR of both eyes. points: (13, 2) or (frames, 13, 2).
+    Returns a scalar or one value per frame.
+    """
+    eyes = points[..., :12, :].reshape(points.shape[:-2] + (2, 6, 2))
+
+    vertical1 = np.linalg.norm(eyes[..., 1, :] - eyes[..., 5, :], axis=-1)
+    vertical2 = np.linalg.norm(eyes[..., 2, :] - eyes[..., 4, :], axis=-1)
+    horizontal = np.linalg.norm(eyes[..., 0, :] - eyes[..., 3, :], axis=-1)
+
+    ear = np.divide(
+        vertical1 + vertical2, 2.0 * horizontal,
+        out=np.zeros_like(horizontal), where=horizontal != 0
+    )
+    return ear.mean(axis=-1)
+
+
+def nose_x(points):
+    """Nose x position. points: (13, 2) or (frames, 13, 2)."""
+    return points[..., NOSE_ROW, 0]
 
 
-def calculate_ear(landmarks, eye_indices):
-    p1 = np.array(landmarks[eye_indices[1]])
-    p2 = np.array(landmarks[eye_indices[5]])
-    p3 = np.array(landmarks[eye_indices[2]])
-    p4 = np.array(landmarks[eye_indices[4]])
-    p0 = np.array(landmarks[eye_indices[0]])
-    p3h = np.array(landmarks[eye_indices[3]])
+# -------------------------
+# ACTION EVALUATORS
+# -------------------------
+# Each one declares the point rows it needs, consumes frames one by
+# one and sets .done as soon as its action is proven.
+class BlinkEvaluator:
+    rows = EYE_ROWS
 
-    vertical1 = np.linalg.norm(p1 - p2)
-    vertical2 = np.linalg.norm(p3 - p4)
-    horizontal = np.linalg.norm(p0 - p3h)
+    def __init__(self):
+        self.done = False
 
-    if horizontal == 0:
-        return 0
+    def update(self, points):
+        if ear_batch(points) < EAR_THRESHOLD:
+            self.done = True
 
-    return (vertical1 + vertical2) / (2.0 * horizontal)
 
+class HeadTurnEvaluator:
+    """
+    Nose moved more than HEAD_TURN_PX away from where it started, in the
+    requested direction, checked after every frame.
+    direction: "left", "right" or "any".
+    """
+    rows = [NOSE_ROW]
 
-def verify_action(frame_paths, action):
+    def __init__(self, direction: str):
+        self.direction = direction
+        self.done = False
+        self.first = None
 
-    blink_detected = False
-    head_left = False
-    head_right = False
-    nose_positions = []
+    def update(self, points):
+        x = float(nose_x(points))
 
-    for path in frame_paths:
-        img = cv2.imread(path)
-        if img is None:
-            continue
+        if self.first is None:
+            self.first = x
+            return
 
-        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = face_mesh.process(rgb)
+        if self.direction in ("left", "any") and self.first - x > HEAD_TURN_PX:
+            self.done = True
+        if self.direction in ("right", "any") and x - self.first > HEAD_TURN_PX:
+            self.done = True
+
+
+def make_evaluator(action: str):
+    if action == "blink":
+        return BlinkEvaluator()
+    if action in ("left", "right"):
+        return HeadTurnEvaluator(action)
+    return None
+
+
+def decode_frames(streams):
+    """
+    Generator: decodes one uploaded frame at a time straight from its
+    file object, so only one decoded frame is alive per call.
+    """
+    for stream in streams:
+        buf = np.frombuffer(stream.read(), dtype=np.uint8)
+        yield cv2.imdecode(buf, cv2.IMREAD_COLOR) if buf.size else None
+
+
+class FramePrep:
+    """
+    Per-call frame preprocessing before FaceMesh:
+    - crop to the face box found in the previous frame (plus margin)
+    - shrink to LIVENESS_FRAME_WIDTH
+    Landmarks come back in full-frame pixels.
+
+    FaceMesh (static_image_mode=False) places its next search window from
+    the previous landmarks, in the previous input's coordinates. Whenever
+    the crop box changes that window is wrong, so the instance is reset
+    and detects afresh on the new crop.
+    """
+
+    def __init__(self, width: int = LIVENESS_FRAME_WIDTH, use_roi: bool = LIVENESS_ROI):
+        self.width = width
+        self.use_roi = use_roi
+        self.roi = None     # (x0, y0, x1, y1) in full-frame pixels
+        self.fed = None     # box of the last frame FaceMesh saw
+        self.resets = 0
+
+    def points(self, face_mesh, img, rows, out):
+        """
+        Runs FaceMesh on one BGR frame and fills only the requested rows of
+        the preallocated `out` array. Returns `out`, or None when no face.
+        """
+        H, W = img.shape[:2]
+
+        x0, y0, x1, y1 = self.roi or (0, 0, W, H)
+        x1, y1 = min(x1, W), min(y1, H)
+        crop = img[y0:y1, x0:x1]
+
+        if self.fed is not None and self.fed != (x0, y0, x1, y1):
+            face_mesh.reset()
+            self.resets += 1
+        self.fed = (x0, y0, x1, y1)
+        cw, ch = x1 - x0, y1 - y0
+
+        if self.width and cw > self.width:
+            crop = cv2.resize(
+                crop, (self.width, max(1, int(ch * self.width / cw))),
+                interpolation=cv2.INTER_AREA
+            )
+
+        with span("facemesh_frame"):
+            rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+            results = face_mesh.process(rgb)
 
         if not results.multi_face_landmarks:
-            continue
+            # lost the face: look at the whole frame again
+            self.roi = None
+            return None
 
         landmarks = results.multi_face_landmarks[0].landmark
-        h, w, _ = img.shape
-        coords = [(int(lm.x * w), int(lm.y * h)) for lm in landmarks]
 
-        # ---- Blink Detection ----
-        left_ear = calculate_ear(coords, LEFT_EYE)
-        right_ear = calculate_ear(coords, RIGHT_EYE)
-        ear = (left_ear + right_ear) / 2
+        if self.use_roi:
+            rows = sorted(set(rows) | set(ROI_ROWS))
 
-        if ear < 0.20:
-            blink_detected = True
+        fill_points(landmarks, rows, cw, ch, out, offset=(x0, y0))
 
-        # ---- Head Movement Tracking ----
-        nose_positions.append(coords[1][0])
+        if self.use_roi:
+            self.update_roi(out, W, H)
 
-    # ---- Head Turn Detection ----
-    if len(nose_positions) > 1:
-        movement = max(nose_positions) - min(nose_positions)
+        return out
 
-        if movement > 25:
-            if nose_positions[-1] < nose_positions[0]:
-                head_left = True
-            if nose_positions[-1] > nose_positions[0]:
-                head_right = True
+    def update_roi(self, points, W, H):
+        xs = points[ROI_ROWS, 0]
+        ys = points[ROI_ROWS, 1]
 
-    if action == "blink":
-        return {"success": blink_detected}
+        span = max(xs.max() - xs.min(), ys.max() - ys.min(), 1.0)
+        margin = span * LIVENESS_ROI_MARGIN
+
+        # keep the crop stable (FaceMesh tracks better) unless the face
+        # drifted into the outer half of the margin
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            keep = margin / 2
+            if (xs.min() - x0 > keep and x1 - xs.max() > keep
+                    and ys.min() - y0 > keep and y1 - ys.max() > keep):
+                return
+
+        self.roi = (
+            max(0, int(xs.min() - margin)),
+            max(0, int(ys.min() - margin)),
+            min(W, int(xs.max() + margin)),
+            min(H, int(ys.max() + margin))
+        )
+
+
+def verify_action(frames, action):
+    """
+    frames: any iterable of BGR images (e.g. decode_frames(...)) or paths.
+    Stops reading frames as soon as the requested action is confirmed.
+    """
+    evaluator = make_evaluator(action)
+    if evaluator is None:
+        return {"success": False, "frames_processed": 0}
+
+    processed = 0
+    points = new_points()
+    prep = FramePrep()
+
+    with face_mesh_pool.session() as face_mesh:
+        for img in frames:
+            if isinstance(img, str):
+                img = cv2.imread(img)
+            if img is None:
+                continue
+
+            processed += 1
+
+            # only the points this action looks at
+            if prep.points(face_mesh, img, evaluator.rows, points) is None:
+                continue
+
+            evaluator.update(points)
+
+            # ✅ EARLY EXIT: action proven, skip the remaining frames
+            if evaluator.done:
+                break
+
+    return {"success": evaluator.done, "frames_processed": processed}
+
+
+# -------------------------
+# STREAMING (one frame at a time)
+# -------------------------
+class LivenessStream:
+    """
+    Blink + head turn (either side) checked together on frames that
+    arrive one by one. push() returns the verdict so far.
+    """
+
+    def __init__(self, face_mesh):
+        self.face_mesh = face_mesh
+        self.blink = BlinkEvaluator()
+        self.head_turn = HeadTurnEvaluator("any")
+        self.frames = 0
+        self.points = new_points()
+        self.prep = FramePrep()
+
+    @property
+    def done(self):
+        return self.blink.done and self.head_turn.done
+
+    def rows(self):
+        # stop paying for the eye points once the blink is proven
+        if self.blink.done:
+            return self.head_turn.rows
+        if self.head_turn.done:
+            return self.blink.rows
+        return self.blink.rows + self.head_turn.rows
+
+    def push(self, data: bytes) -> dict:
+        self.frames += 1
+
+        # empty message: imdecode would assert, count it as a frame without a face
+        buf = np.frombuffer(data, dtype=np.uint8)
+        img = cv2.imdecode(buf, cv2.IMREAD_COLOR) if buf.size else None
 
-    if action == "left":
-        return {"success": head_left}
+        points = None
+        if img is not None:
+            points = self.prep.points(self.face_mesh, img, self.rows(), self.points)
 
-    if action == "right":
-        return {"success": head_right}
+        if points is not None:
+            if not self.blink.done:
+                self.blink.update(points)
+            if not self.head_turn.done:
+                self.head_turn.update(points)
 
-    return {"success": False}
+        return {
+            "frame": self.frames,
+            "face": points is not None,
+            "blink": self.blink.done,
+            "head_turn": self.head_turn.done,
+            "done": self.done
+        }
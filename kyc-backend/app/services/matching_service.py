@@ -1,4 +1,5 @@
 from rapidfuzz import fuzz
+from rapidfuzz.utils import default_process
 
 # -------------------------
 # CONFIG (PRODUCTION READY)
@@ -63,4 +64,24 @@ def match_names(user_name: str, ocr_name: str):
         "score": round(score, 2),
         "match": match,
         "level": level
-    }
\ No newline at end of file
+    }
+
+
+# -------------------------
+# DECISION SCORE (strict)
+# -------------------------
+def sort_score(user_name: str, ocr_name: str) -> int:
+    """
+    token_sort_ratio only, the score the final decision gates on.
+    Unlike match_names it doesn't take partial / token_set matches,
+    so a dropped or extra surname still lowers it.
+
+    Scored like fuzzywuzzy's token_sort_ratio, which the gate was set
+    against: punctuation becomes spaces, lowercased, rounded to an int
+    ("Ram-Prasad Verma" vs "Ram Prasad Verma" is 100, 79.5 passes 80).
+    """
+    if not user_name or not ocr_name:
+        return 0
+    score = fuzz.token_sort_ratio(user_name, ocr_name, processor=default_process)
+    # fuzzywuzzy's utils.intr
+    return int(round(score))
\ No newline at end of file
@@ -0,0 +1,120 @@
+import os
+from contextlib import ExitStack
+import cv2
+import numpy as np
+from insightface.utils import face_align
+
+from . import ocr_pool, ocr_service
+from .face_service import FACE_DET_SIZES, detect_largest, embed_aligned, get_face_app
+from .liveness_service import face_mesh_pool
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+# models this worker loads at startup, e.g. "ocr" for an OCR-only worker.
+# Anything not listed still loads lazily on first use.
+KYC_MODELS = [
+    m.strip()
+    for m in os.getenv("KYC_MODELS", "face,ocr,liveness").split(",")
+    if m.strip()
+]
+
+# run one inference on synthetic images so the first request
+# doesn't pay for graph / session initialisation
+KYC_WARMUP = os.getenv("KYC_WARMUP", "true").lower() == "true"
+
+
+# -------------------------
+# SYNTHETIC INPUTS
+# -------------------------
+def synthetic_card():
+    img = np.full((400, 1000, 3), 255, dtype=np.uint8)
+    cv2.putText(img, "Sample Name", (60, 140), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (0, 0, 0), 3)
+    cv2.putText(img, "DOB: 01/01/1990", (60, 220), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (0, 0, 0), 3)
+    cv2.putText(img, "2345 6789 0123", (60, 320), cv2.FONT_HERSHEY_SIMPLEX, 1.8, (0, 0, 0), 4)
+    return img
+
+
+# -------------------------
+# LOADERS
+# -------------------------
+def load_face(warm: bool):
+    get_face_app()
+    if not warm:
+        return
+
+    # one pass per detector input size: onnxruntime sets up each shape once
+    for size in FACE_DET_SIZES:
+        detect_largest(np.full((size * 3 // 4, size, 3), 128, dtype=np.uint8))
+
+    # detection finds nothing on a blank image, so feed the recognizer
+    # a chip aligned to the ArcFace template directly (batch of 3, as in compare)
+    chip = np.full((112, 112, 3), 128, dtype=np.uint8)
+    embed_aligned([chip] * 3, face_align.arcface_dst)
+
+
+def load_ocr(warm: bool):
+    if ocr_pool.OCR_POOL_ENABLED:
+        # workers load their own model in their initializer
+        n = min(ocr_pool.OCR_WORKERS, ocr_pool.OCR_QUEUE_SIZE)
+        futures = [ocr_pool.submit(synthetic_card()) for _ in range(n)]
+        for f in futures:
+            f.result()
+        return
+
+    ocr_service.get_ocr()
+    if warm:
+        ocr_service.run_ocr_multi([synthetic_card()])
+
+
+def load_liveness(warm: bool):
+    face_mesh_pool.fill()
+    if not warm:
+        return
+
+    # check out every instance once so each runs its first graph pass
+    blank = np.zeros((480, 640, 3), dtype=np.uint8)
+    with ExitStack() as stack:
+        meshes = [
+            stack.enter_context(face_mesh_pool.session())
+            for _ in range(face_mesh_pool.size)
+        ]
+        for face_mesh in meshes:
+            face_mesh.process(blank)
+
+
+MODEL_LOADERS = {
+    "face": load_face,
+    "ocr": load_ocr,
+    "liveness": load_liveness
+}
+
+
+# -------------------------
+# STATE
+# -------------------------
+model_status = {name: "pending" for name in KYC_MODELS}
+
+
+def load_models():
+    """
+    Loads (and warms) every model in KYC_MODELS. Runs in a background
+    thread at startup so /healthz answers while this is in progress.
+    """
+    for name in KYC_MODELS:
+        loader = MODEL_LOADERS.get(name)
+        if loader is None:
+            model_status[name] = "unknown"
+            continue
+
+        model_status[name] = "loading"
+        try:
+            loader(KYC_WARMUP)
+            model_status[name] = "ready"
+        except Exception as e:
+            model_status[name] = f"failed: {e}"
+
+
+def is_ready() -> bool:
+    return all(status == "ready" for status in model_status.values())
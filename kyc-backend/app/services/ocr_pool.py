@@ -0,0 +1,179 @@
+import os
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+
+from . import ocr_service
+from .image_service import ImageHandle
+from ..instrumentation import span
+
+
+# -------------------------
+# CONFIG
+# -------------------------
+CPU_COUNT = os.cpu_count() or 1
+
+
+def size_from_env(name: str, default: int) -> int:
+    """
+    "8"    -> 8
+    "0.5"  -> half of the cores
+    """
+    raw = os.getenv(name)
+    if not raw:
+        return default
+
+    value = float(raw)
+    if value < 1:
+        return max(1, int(CPU_COUNT * value))
+    return int(value)
+
+
+OCR_POOL_ENABLED = os.getenv("OCR_POOL_ENABLED", "false").lower() == "true"
+
+# PaddleOCR is already multi-threaded inside, so default to 1 worker per 4 cores
+OCR_WORKERS = size_from_env("OCR_WORKERS", max(1, CPU_COUNT // 4))
+OCR_THREADS_PER_WORKER = max(1, CPU_COUNT // OCR_WORKERS)
+
+# jobs waiting + running; beyond this new uploads get rejected
+OCR_QUEUE_SIZE = size_from_env("OCR_QUEUE_SIZE", OCR_WORKERS * 2)
+OCR_QUEUE_TIMEOUT = float(os.getenv("OCR_QUEUE_TIMEOUT", "30"))
+
+
+class OCRPoolBusy(Exception):
+    pass
+
+
+# -------------------------
+# WORKER SIDE
+# -------------------------
+def init_worker(threads: int):
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["OCR_CPU_THREADS"] = str(threads)
+
+    # load the model once, before the first job arrives
+    ocr_service.get_ocr()
+
+
+def ocr_task(shm_name: str, shape: tuple, dtype: str):
+    # spawned workers share the parent's resource tracker, so attaching
+    # here needs no unregister: the parent's unlink() stays the only one
+    shm = shared_memory.SharedMemory(name=shm_name)
+
+    img = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    try:
+        return ocr_service.extract_aadhaar_data(img)
+    finally:
+        del img
+        shm.close()
+
+
+# -------------------------
+# PARENT SIDE
+# -------------------------
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(OCR_QUEUE_SIZE)
+_stats_lock = threading.Lock()
+_stats = {"in_flight": 0, "submitted": 0, "rejected": 0, "rebuilds": 0}
+
+
+def count(key: str, value: int = 1):
+    with _stats_lock:
+        _stats[key] += value
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        # a worker died (e.g. Paddle crashed): every later submit would fail
+        if _pool is not None and _pool._broken:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            count("rebuilds")
+
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                mp_context=get_context("spawn"),
+                initializer=init_worker,
+                initargs=(OCR_THREADS_PER_WORKER,)
+            )
+    return _pool
+
+
+def submit(img: np.ndarray):
+    """
+    Copies the decoded image into shared memory and queues it.
+    Raises OCRPoolBusy when the queue stays full for OCR_QUEUE_TIMEOUT.
+    """
+    if not _slots.acquire(timeout=OCR_QUEUE_TIMEOUT):
+        count("rejected")
+        raise OCRPoolBusy("OCR queue is full")
+
+    shm = None
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=img.nbytes)
+        np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)[:] = img
+
+        try:
+            future = get_pool().submit(ocr_task, shm.name, img.shape, img.dtype.str)
+        except BrokenProcessPool:
+            # broke between the check and the submit: one retry on a new pool
+            future = get_pool().submit(ocr_task, shm.name, img.shape, img.dtype.str)
+    except Exception:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        _slots.release()
+        raise
+
+    count("submitted")
+    count("in_flight")
+
+    def release(_):
+        shm.close()
+        shm.unlink()
+        count("in_flight", -1)
+        _slots.release()
+
+    future.add_done_callback(release)
+    return future
+
+
+def run_ocr(image):
+    """
+    Drop-in for ocr_service.run_ocr: uses the worker pool when enabled,
+    otherwise runs in the calling thread.
+    """
+    if not OCR_POOL_ENABLED:
+        return ocr_service.run_ocr(image)
+
+    img = ImageHandle.of(image).bgr
+    if img is None:
+        return ocr_service.empty_result()
+
+    # per-variant spans happen inside the worker process; this is the
+    # queue wait + OCR as the request sees it
+    with span("ocr_pool"):
+        return submit(np.ascontiguousarray(img)).result()
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return {
+            "enabled": OCR_POOL_ENABLED,
+            "workers": OCR_WORKERS if OCR_POOL_ENABLED else 0,
+            "queue_size": OCR_QUEUE_SIZE,
+            **_stats
+        }
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
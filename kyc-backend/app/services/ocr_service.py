@@ -1,3 +1,6 @@
+import os
+import copy
+import threading
 import cv2
 import re
 import numpy as np
@@ -5,8 +8,14 @@ from paddleocr import PaddleOCR
 from rapidfuzz import fuzz
 from rapidfuzz import fuzz   # ensure this is imported
 
+# paddleocr puts its own folder on sys.path, these are its internal helpers
+from ppocr.data import transform
+from tools.infer.predict_system import sorted_boxes
+from tools.infer.utility import get_rotate_crop_image
+
+from .image_service import ImageHandle
+from ..instrumentation import span
 
-ocr = PaddleOCR(use_angle_cls=True, lang="en", show_log=False)
 
 # -------------------------
 # CONFIG
@@ -14,6 +23,47 @@ ocr = PaddleOCR(use_angle_cls=True, lang="en", show_log=False)
 OCR_CONF_THRESHOLD = 0.75
 NAME_MATCH_THRESHOLD = 70
 
+# crops from all variants are recognized together, so a bigger batch helps
+OCR_REC_BATCH = int(os.getenv("OCR_REC_BATCH", "16"))
+
+# Cascade mode: run the first variant (in this order) alone and stop if it
+# reaches OCR_CASCADE_STOP_SCORE with confidence >= OCR_CONF_THRESHOLD;
+# otherwise the rest go through one batched pass.
+# Off -> all variants go through one batched pass.
+OCR_CASCADE = os.getenv("OCR_CASCADE", "true").lower() == "true"
+OCR_CASCADE_STOP_SCORE = int(os.getenv("OCR_CASCADE_STOP_SCORE", "10"))
+OCR_VARIANT_ORDER = [
+    v.strip()
+    for v in os.getenv("OCR_VARIANT_ORDER", "gray,thresh,sharp,invert").split(",")
+    if v.strip()
+]
+
+
+# -------------------------
+# MODEL (lazy, one per process)
+# -------------------------
+_ocr = None
+_ocr_lock = threading.Lock()
+
+
+def get_ocr():
+    """
+    Builds PaddleOCR on first use. OCR pool workers each call this in
+    their own process, so every worker owns its own predictor.
+    """
+    global _ocr
+    if _ocr is None:
+        with _ocr_lock:
+            if _ocr is None:
+                _ocr = PaddleOCR(
+                    use_angle_cls=True,
+                    lang="en",
+                    show_log=False,
+                    rec_batch_num=OCR_REC_BATCH,
+                    cpu_threads=int(os.getenv("OCR_CPU_THREADS", "10"))
+                )
+    return _ocr
+
 
 # -------------------------
 # UTIL
@@ -32,10 +82,9 @@ def correct_digits(text):
 # -------------------------
 # MULTI PREPROCESS
 # -------------------------
-def preprocess_variants(image_path):
-    img = cv2.imread(image_path)
-
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+def preprocess_variants(image):
+    # accepts a file path, a decoded BGR image or an ImageHandle
+    gray = ImageHandle.of(image).gray
 
     h, w = gray.shape
     if w < 1000:
@@ -51,19 +100,104 @@ def preprocess_variants(image_path):
 
     invert = cv2.bitwise_not(gray)
 
-    return [gray, thresh, sharp, invert]
+    return {
+        "gray": gray,
+        "thresh": thresh,
+        "sharp": sharp,
+        "invert": invert
+    }
 
 
 # -------------------------
-# OCR RUN
+# OCR RUN (BATCHED)
 # -------------------------
-def run_ocr_multi(images):
-    results = []
+def to_bgr(img):
+    # PaddleOCR models expect 3 channels (ocr.ocr() converts gray itself)
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    return img
+
+
+def detect_text_batch(images):
+    """
+    Text detection for ALL images in a single predictor call.
+    Variants from preprocess_variants share one shape, so their resized
+    tensors stack into one batch. Falls back to one-by-one otherwise.
+    """
+    det = get_ocr().text_detector
+
+    tensors = []
+    shapes = []
     for img in images:
-        res = ocr.ocr(img, cls=True)
-        if res and res[0]:
-            results.append(res)
-    return results
+        data = transform({"image": img}, det.preprocess_op)
+        if data is None:
+            return [det(img)[0] for img in images]
+        tensors.append(data[0])
+        shapes.append(data[1])
+
+    if len({t.shape for t in tensors}) != 1:
+        return [det(img)[0] for img in images]
+
+    batch = np.stack(tensors)
+    shape_list = np.stack(shapes)
+
+    if det.use_onnx:
+        outputs = det.predictor.run(
+            det.output_tensors, {det.input_tensor.name: batch}
+        )
+    else:
+        det.input_tensor.copy_from_cpu(batch)
+        det.predictor.run()
+        outputs = [t.copy_to_cpu() for t in det.output_tensors]
+
+    post = det.postprocess_op({"maps": outputs[0]}, shape_list)
+
+    return [
+        det.filter_tag_det_res(p["points"], img.shape)
+        for p, img in zip(post, images)
+    ]
+
+
+def run_ocr_multi(images):
+    """
+    Same output as calling ocr.ocr(img, cls=True) per image, but:
+    - detection runs once for all variants
+    - every detected crop is classified + recognized in shared batches
+    """
+    if not images:
+        return []
+
+    ocr = get_ocr()
+    images = [to_bgr(img) for img in images]
+    boxes_per_image = detect_text_batch(images)
+
+    crops = []
+    owners = []
+
+    for idx, (img, dt_boxes) in enumerate(zip(images, boxes_per_image)):
+        if dt_boxes is None or len(dt_boxes) == 0:
+            continue
+
+        for box in sorted_boxes(dt_boxes):
+            crops.append(get_rotate_crop_image(img, copy.deepcopy(box)))
+            owners.append((idx, box))
+
+    if not crops:
+        return [None for _ in images]
+
+    if ocr.use_angle_cls:
+        crops, _, _ = ocr.text_classifier(crops)
+
+    rec_res, _ = ocr.text_recognizer(crops)
+
+    lines = [[] for _ in images]
+    for (idx, box), (text, score) in zip(owners, rec_res):
+        if score >= ocr.drop_score:
+            lines[idx].append([box.tolist(), (text, score)])
+
+    # one entry per input image, same shape as ocr.ocr():
+    # [[ [box, (text, conf)], ... ]]  or None when nothing was read
+    return [[l] if l else None for l in lines]
 
 
 # -------------------------
@@ -335,51 +469,119 @@ def extract_gender(text: str):
 # -------------------------
 # OCR ENGINE
 # -------------------------
-def extract_aadhaar_data(image_path):
-    images = preprocess_variants(image_path)
-    results = run_ocr_multi(images)
-
-    best = None
-    best_score = 0
+def empty_result(skipped=0):
+    return {"confidence": 0, "variant": None, "variants_skipped": skipped}
 
-    for res in results:
-        text = " ".join([l[1][0] for l in res[0]])
 
-        # aadhaar = extract_aadhaar(text)
-        aadhaar = extract_aadhaar_number_from_result(res)
+def score_result(res):
+    text = " ".join([l[1][0] for l in res[0]])
 
-        name = extract_name(res)
-        dob = extract_dob(text)
-        dob = format_dob(dob)
-        # 🔥 NEW: Extract gender
-        gender = extract_gender(text)
+    # aadhaar = extract_aadhaar(text)
+    aadhaar = extract_aadhaar_number_from_result(res)
 
-        score = 0
+    name = extract_name(res)
+    dob = extract_dob(text)
+    dob = format_dob(dob)
+    # 🔥 NEW: Extract gender
+    gender = extract_gender(text)
 
-        if aadhaar:
-            score += 5   # most important
-        if name:
-            score += 3
-        if dob:
-            score += 2
+    score = 0
 
-        if score > best_score:
-            best_score = score
-            best = (aadhaar, name, dob, gender, res)
+    if aadhaar:
+        score += 5   # most important
+    if name:
+        score += 3
+    if dob:
+        score += 2
 
-    if not best:
-        return {"confidence": 0}
-    aadhaar, name, dob, gender, res = best
     conf = sum([l[1][1] for l in res[0]]) / len(res[0])
+
     return {
+        "aadhaar": aadhaar,
         "name": name,
         "dob": dob,
         "gender": gender,
-        "aadhaar_number": mask_aadhaar(aadhaar),
-        "aadhaar_full": aadhaar,
-        "confidence": round(conf, 2)
+        "score": score,
+        "conf": conf
+    }
+
+
+def is_solved(parsed):
+    return (
+        parsed["score"] >= OCR_CASCADE_STOP_SCORE
+        and parsed["conf"] >= OCR_CONF_THRESHOLD
+    )
+
+
+def run_batch(variants, names):
+    if not names:
+        return []
+    with span("ocr:batch", variants=len(names)):
+        results = run_ocr_multi([variants[v] for v in names])
+    with span("ocr_extract"):
+        return [
+            (name, score_result(res) if res else None)
+            for name, res in zip(names, results)
+        ]
+
+
+def run_variants(variants):
+    """
+    Returns ([(variant_name, parsed_or_None), ...], skipped_count)
+    for the variants that actually went through OCR.
+    """
+    order = [v for v in OCR_VARIANT_ORDER if v in variants]
+    if not order:
+        return [], 0
+
+    if not OCR_CASCADE:
+        return run_batch(variants, order), 0
+
+    # most cards are read by the first variant alone
+    name = order[0]
+    with span(f"ocr:{name}"):
+        res = run_ocr_multi([variants[name]])[0]
+    with span("ocr_extract"):
+        parsed = score_result(res) if res else None
+
+    # ✅ EARLY EXIT: this variant already read everything
+    if parsed and is_solved(parsed):
+        return [(name, parsed)], len(order) - 1
+
+    # not solved: the rest in one batched pass, not one pass each
+    return [(name, parsed)] + run_batch(variants, order[1:]), 0
+
+
+def extract_aadhaar_data(image):
+    with span("ocr_preprocess"):
+        variants = preprocess_variants(image)
+    results, skipped = run_variants(variants)
+
+    best = None
+    best_score = 0
+
+    for variant, parsed in results:
+        if not parsed:
+            continue
+
+        if parsed["score"] > best_score:
+            best_score = parsed["score"]
+            best = (variant, parsed)
+
+    if not best:
+        return empty_result(skipped)
+    variant, parsed = best
+    return {
+        "name": parsed["name"],
+        "dob": parsed["dob"],
+        "gender": parsed["gender"],
+        "aadhaar_number": mask_aadhaar(parsed["aadhaar"]),
+        "aadhaar_full": parsed["aadhaar"],
+        "confidence": round(parsed["conf"], 2),
+        "variant": variant,
+        "variants_skipped": skipped
     }
 
 
-def run_ocr(path):
-    return extract_aadhaar_data(path)
\ No newline at end of file
+def run_ocr(image):
+    return extract_aadhaar_data(image)
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Denoise backend benchmark for face_service.process_variants.
+
+Image set: a folder with <id>_face.jpg (Aadhaar face crop, as saved by
+extract_aadhaar_face) and <id>_selfie.jpg pairs.
+
+    python -m benchmarks.bench_denoise --images data/faces
+    python -m benchmarks.bench_denoise --images data/faces --backends nlmeans,bilateral
+
+Reports per backend: denoise time, final match score distribution, match
+rate at 0.50 and the per-pair score change vs the current "nlmeans" path.
+"""
+import argparse
+import cv2
+import numpy as np
+
+from app.services.face_service import (
+    DENOISE_BACKENDS,
+    aadhaar_embeddings,
+    denoise,
+    get_embedding,
+    score_embeddings
+)
+from benchmarks.common import Timer, load_pairs, print_table, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", required=True)
+    parser.add_argument("--backends", default=",".join(DENOISE_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats per crop")
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    pairs = load_pairs(args.images)
+    if not pairs:
+        raise SystemExit(f"No <id>_face / <id>_selfie pairs in {args.images}")
+
+    crops = {pid: cv2.imread(face) for pid, face, _ in pairs}
+    selfies = {pid: get_embedding(cv2.imread(selfie)) for pid, _, selfie in pairs}
+
+    timings = {}
+    scores = {}
+
+    for backend in backends:
+        timings[backend] = []
+        scores[backend] = {}
+
+        for pid, crop in crops.items():
+            if crop is None or selfies[pid] is None:
+                continue
+
+            for _ in range(args.repeat):
+                with Timer() as t:
+                    denoise(crop, backend)
+                timings[backend].append(t.ms)
+
+            embs = aadhaar_embeddings(crop, backend)
+            scores[backend][pid] = score_embeddings(embs, selfies[pid])["similarity"]
+
+    baseline = scores.get("nlmeans", {})
+
+    print_table("denoise time (ms)", {b: summarize(timings[b]) for b in backends})
+    print_table("match score", {b: summarize(list(scores[b].values())) for b in backends})
+
+    rates = {}
+    for b in backends:
+        values = list(scores[b].values())
+        rates[b] = {"match_rate": round(float(np.mean([v >= 0.50 for v in values])), 3) if values else 0}
+        if baseline and b != "nlmeans":
+            deltas = [scores[b][pid] - baseline[pid] for pid in scores[b] if pid in baseline]
+            rates[b].update({f"delta_{k}": v for k, v in summarize(deltas).items() if k != "n"})
+    print_table("decision vs nlmeans", rates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Face-match latency breakdown and score distribution for face_service.
+
+Image set: a folder with <id>_front.jpg (Aadhaar card front) and
+<id>_selfie.jpg pairs. Folders with <id>_face.jpg crops instead of fronts
+work too; the extraction stage is then skipped.
+
+    python -m benchmarks.bench_face --images data/kyc
+    python -m benchmarks.bench_face --images data/kyc --det-sizes 320,480,640
+
+Reports p50/p95/p99 for:
+  extract_aadhaar_face (adaptive upscale detect, CLAHE fallback rate), the
+  denoise and CLAHE enhance steps of process_variants plus its total (the
+  original variant is the input itself, nothing to time), get_embedding
+  split into detector (incl. the upsample retry) vs recognizer,
+  compare_faces end to end;
+plus the score distribution, which variant wins how often, and a
+detector input-size sweep (time + detection rate per size).
+Note: extraction archives its crops to uploads/aadhaar/face like the API.
+"""
+import argparse
+import cv2
+import numpy as np
+
+from app.services.face_service import (
+    aadhaar_embeddings,
+    card_scale,
+    compare_faces,
+    denoise,
+    detect_faces,
+    detect_largest,
+    embed_aligned,
+    enhance,
+    extract_aadhaar_face_image,
+    get_face_app,
+    process_variants,
+    variant_names
+)
+from app.services.image_service import ImageHandle
+from benchmarks.common import Timer, load_pairs, print_table, summarize
+
+
+def timed_embedding(img, timings, prefix):
+    """get_embedding, but with detector and recognizer timed apart."""
+    # same first call as detect_largest, only to learn if it retries
+    bboxes, _ = detect_faces(img)
+    retried = len(bboxes) == 0 and img.shape[0] < 300
+
+    with Timer() as t:
+        kps = detect_largest(img)
+    timings.setdefault(f"{prefix}:detect", []).append(t.ms)
+    if retried:
+        timings.setdefault(f"{prefix}:detect_retry", []).append(t.ms)
+
+    if kps is None:
+        return None, retried
+
+    with Timer() as t:
+        emb = embed_aligned([img], kps)[0]
+    timings.setdefault(f"{prefix}:recognize", []).append(t.ms)
+    return emb, retried
+
+
+def det_size_sweep(images, sizes):
+    det = get_face_app().det_model
+    rows = {}
+
+    for size in sizes:
+        times, found = [], []
+        for img in images:
+            with Timer() as t:
+                bboxes, _ = det.detect(img, input_size=(size, size), max_num=0, metric="default")
+            times.append(t.ms)
+            found.append(len(bboxes) > 0)
+
+        stats = summarize(times)
+        stats["detect_rate"] = round(float(np.mean(found)), 3) if found else 0
+        rows[f"{size}x{size}"] = stats
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", required=True)
+    parser.add_argument("--det-sizes", default="320,480,640", help="detector input sizes to sweep")
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.images, left="front")
+    has_fronts = bool(pairs)
+    if not has_fronts:
+        pairs = load_pairs(args.images, left="face")
+    if not pairs:
+        raise SystemExit(f"No <id>_front (or <id>_face) / <id>_selfie pairs in {args.images}")
+
+    # model load + first inference are not part of the numbers
+    warm = cv2.imread(pairs[0][2])
+    get_face_app()
+    detect_largest(warm)
+
+    timings = {}
+    extract_fallbacks = 0
+    retries = {"selfie": 0, "aadhaar": 0}
+    scores = []
+    wins = {name: 0 for name in variant_names()}
+    crops, selfies = [], []
+
+    for pid, left, selfie_path in pairs:
+        # ---- 1. card -> face crop ----
+        if has_fronts:
+            front = ImageHandle.from_path(left)
+            if front.bgr is None:
+                continue
+
+            with Timer() as t:
+                bboxes, _ = detect_faces(front.upscaled(card_scale(front.bgr)))
+            timings.setdefault("extract:upscaled_detect", []).append(t.ms)
+            if len(bboxes) == 0:
+                extract_fallbacks += 1
+
+            # fresh handle: nothing cached from the call above
+            with Timer() as t:
+                crop = extract_aadhaar_face_image(ImageHandle.from_path(left))
+            timings.setdefault("extract:total", []).append(t.ms)
+            if crop is None:
+                continue
+            crop = crop.bgr
+        else:
+            crop = cv2.imread(left)
+            if crop is None:
+                continue
+
+        # ---- 2. variants: each step timed in one run, the way
+        # process_variants chains them (enhanced builds on denoised) ----
+        with Timer() as t:
+            denoised = denoise(crop)
+        timings.setdefault("variant:denoise", []).append(t.ms)
+        with Timer() as t:
+            enhance(denoised)
+        timings.setdefault("variant:enhance", []).append(t.ms)
+        with Timer() as t:
+            process_variants(crop)
+        timings.setdefault("variant:total", []).append(t.ms)
+
+        # ---- 3. embeddings: detector vs recognizer ----
+        selfie = cv2.imread(selfie_path)
+        if selfie is None:
+            continue
+        emb_selfie, retried = timed_embedding(selfie, timings, "selfie")
+        retries["selfie"] += retried
+        _, retried = timed_embedding(crop, timings, "aadhaar")
+        retries["aadhaar"] += retried
+
+        crops.append(crop)
+        selfies.append(selfie)
+
+        # ---- 4. end to end + which variant wins ----
+        with Timer() as t:
+            result = compare_faces(crop, selfie)
+        timings.setdefault("compare_faces", []).append(t.ms)
+
+        if emb_selfie is None or "similarity" not in result:
+            continue
+        scores.append(result["similarity"])
+
+        embs = aadhaar_embeddings(crop)
+        per_variant = {
+            name: float(np.dot(emb, emb_selfie))
+            for name, emb in (embs or {}).items() if emb is not None
+        }
+        if per_variant:
+            wins[max(per_variant, key=per_variant.get)] += 1
+
+    n = len(crops)
+    print_table("latency (ms)", {k: summarize(v) for k, v in timings.items()})
+
+    print_table("paths taken", {
+        "extract_clahe_fallback": {"count": extract_fallbacks, "of": len(pairs) if has_fronts else 0},
+        "selfie_upsample_retry": {"count": retries["selfie"], "of": n},
+        "aadhaar_upsample_retry": {"count": retries["aadhaar"], "of": n}
+    })
+
+    summary = summarize(scores)
+    summary["match_rate"] = round(float(np.mean([s >= 0.50 for s in scores])), 3) if scores else 0
+    print_table("similarity", {"best_variant": summary})
+
+    decided = sum(wins.values())
+    print_table("winning variant", {
+        name: {"wins": count, "share": round(count / decided, 3) if decided else 0}
+        for name, count in wins.items()
+    })
+
+    sizes = [int(s) for s in args.det_sizes.split(",") if s.strip()]
+    print_table("detector size sweep: aadhaar crops", det_size_sweep(crops, sizes))
+    print_table("detector size sweep: selfies", det_size_sweep(selfies, sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Per-frame landmark overhead in liveness_service, before vs after
+vectorisation. FaceMesh itself is not run: a synthetic 478-point result
+stands in for it, so only the Python/NumPy work after inference is timed.
+
+    python -m benchmarks.bench_landmarks --frames 30 --repeat 200
+"""
+import argparse
+import random
+import numpy as np
+from types import SimpleNamespace
+
+from app.services.liveness_service import (
+    EYE_ROWS,
+    LEFT_EYE,
+    NOSE,
+    NOSE_ROW,
+    RIGHT_EYE,
+    ear_batch,
+    fill_points,
+    new_points,
+    nose_x
+)
+from benchmarks.common import Timer, print_table, summarize
+
+W, H = 1280, 720
+
+
+def fake_landmarks():
+    return [SimpleNamespace(x=random.random(), y=random.random()) for _ in range(478)]
+
+
+# the per-eye EAR liveness_service used before ear_batch
+def calculate_ear(landmarks, eye_indices):
+    p1 = np.array(landmarks[eye_indices[1]])
+    p2 = np.array(landmarks[eye_indices[5]])
+    p3 = np.array(landmarks[eye_indices[2]])
+    p4 = np.array(landmarks[eye_indices[4]])
+    p0 = np.array(landmarks[eye_indices[0]])
+    p3h = np.array(landmarks[eye_indices[3]])
+
+    vertical1 = np.linalg.norm(p1 - p2)
+    vertical2 = np.linalg.norm(p3 - p4)
+    horizontal = np.linalg.norm(p0 - p3h)
+
+    if horizontal == 0:
+        return 0
+
+    return (vertical1 + vertical2) / (2.0 * horizontal)
+
+
+def before(frames):
+    # the old path: all 478 points as tuples, one np.array per eye point
+    for landmarks in frames:
+        coords = [(int(lm.x * W), int(lm.y * H)) for lm in landmarks]
+        ear = (calculate_ear(coords, LEFT_EYE) + calculate_ear(coords, RIGHT_EYE)) / 2
+        nose = coords[NOSE][0]
+    return ear, nose
+
+
+def after(frames):
+    # per frame: 13 points into one preallocated array
+    points = new_points()
+    rows = EYE_ROWS + [NOSE_ROW]
+    for landmarks in frames:
+        fill_points(landmarks, rows, W, H, points)
+        ear = ear_batch(points)
+        nose = nose_x(points)
+    return ear, nose
+
+
+def after_batched(frames):
+    # whole call at once: (frames, 13, 2), one EAR / nose computation
+    points = new_points(len(frames))
+    rows = EYE_ROWS + [NOSE_ROW]
+    for i, landmarks in enumerate(frames):
+        fill_points(landmarks, rows, W, H, points[i])
+    return ear_batch(points), nose_x(points)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    frames = [fake_landmarks() for _ in range(args.frames)]
+
+    results = {}
+    for name, fn in [("before", before), ("after", after), ("after_batched", after_batched)]:
+        per_frame_us = []
+        for _ in range(args.repeat):
+            with Timer() as t:
+                fn(frames)
+            per_frame_us.append(t.ms * 1000 / args.frames)
+        results[name] = summarize(per_frame_us)
+
+    print_table(f"per-frame overhead (us), {args.frames} frames/call", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+FaceMesh on real frame sequences with and without the face ROI crop.
+
+Frames: a folder of frame images (sorted by name), or a video file.
+Each mode runs its own fresh FaceMesh, the way a liveness call does.
+
+    python -m benchmarks.bench_liveness_roi --frames data/liveness/seq1
+    python -m benchmarks.bench_liveness_roi --frames data/liveness/turn.mp4
+
+Reports per mode: share of frames with a face found, time per frame and,
+for the ROI mode, how often FaceMesh was reset because the crop moved.
+The face-found share with ROI should match LIVENESS_ROI=false.
+"""
+import os
+import glob
+import argparse
+import cv2
+
+from app.services.liveness_service import FramePrep, mp_face_mesh, new_points, EYE_ROWS, NOSE_ROW
+from benchmarks.common import Timer, print_table, summarize
+
+
+def load_frames(source: str):
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.*")))
+        frames = [cv2.imread(p) for p in paths]
+        return [f for f in frames if f is not None]
+
+    frames = []
+    cap = cv2.VideoCapture(source)
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(frames, use_roi: bool):
+    prep = FramePrep(use_roi=use_roi)
+    points = new_points()
+    rows = EYE_ROWS + [NOSE_ROW]
+    found, times = 0, []
+
+    with mp_face_mesh.FaceMesh(
+        static_image_mode=False, max_num_faces=1, refine_landmarks=True
+    ) as face_mesh:
+        for img in frames:
+            with Timer() as t:
+                hit = prep.points(face_mesh, img, rows, points) is not None
+            times.append(t.ms)
+            found += hit
+
+    stats = summarize(times)
+    stats["face_found"] = round(found / len(frames), 3)
+    stats["resets"] = prep.resets
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", required=True, help="folder of frames or a video file")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames)
+    if not frames:
+        raise SystemExit(f"No frames in {args.frames}")
+
+    print_table(f"per frame (ms), {len(frames)} frames", {
+        "full_frame": run(frames, use_roi=False),
+        "roi": run(frames, use_roi=True)
+    })
+
+
+if __name__ == "__main__":
+    main()
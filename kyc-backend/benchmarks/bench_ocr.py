@@ -0,0 +1,250 @@
+"""
+OCR speed + accuracy benchmark over synthetic Aadhaar-like cards.
+
+Cards are rendered locally (name, DOB, gender, 12-digit number) and then
+degraded with noise, blur, rotation and shadows, so no real documents are
+needed and every field has a known ground truth.
+
+    python -m benchmarks.bench_ocr --cards 50
+    python -m benchmarks.bench_ocr --cards 200 --difficulty hard --save data/cards
+    python -m benchmarks.bench_ocr --cards 100 --min-accuracy 0.85   # CI gate
+
+Reports: per-stage timings (preprocess, each OCR variant, field extraction),
+end-to-end extract_aadhaar_data latency + throughput, peak RSS and
+field-level accuracy. Exits 1 when a field is below --min-accuracy.
+"""
+import os
+import re
+import time
+import argparse
+import resource
+import cv2
+import numpy as np
+
+from app.services.ocr_service import (
+    OCR_VARIANT_ORDER,
+    extract_aadhaar_data,
+    get_ocr,
+    preprocess_variants,
+    run_ocr_multi,
+    score_result
+)
+from benchmarks.common import Timer, print_table, summarize
+
+
+FIRST_NAMES = [
+    "Rahul", "Priya", "Amit", "Sneha", "Vikram", "Anjali", "Rohan", "Kavita",
+    "Suresh", "Meena", "Arjun", "Pooja", "Nishar", "Deepak", "Sunita", "Imran"
+]
+LAST_NAMES = [
+    "Sharma", "Verma", "Patel", "Singh", "Kumar", "Ahmad", "Reddy", "Gupta",
+    "Nair", "Joshi", "Khan", "Das", "Mehta", "Iyer", "Yadav", "Bose"
+]
+FIELDS = ["name", "dob", "gender", "aadhaar"]
+DIFFICULTIES = ["clean", "mild", "hard"]
+
+
+# -------------------------
+# SYNTHETIC CARDS
+# -------------------------
+def render_card(rng):
+    """Returns (BGR card, truth) laid out like the front of an Aadhaar card."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    dob = f"{rng.integers(1, 29):02d}/{rng.integers(1, 13):02d}/{rng.integers(1950, 2006)}"
+    gender = str(rng.choice(["MALE", "FEMALE"]))
+    digits = str(rng.integers(2, 10)) + "".join(str(d) for d in rng.integers(0, 10, 11))
+    number = f"{digits[:4]} {digits[4:8]} {digits[8:]}"
+
+    card = np.full((630, 1000, 3), 245, np.uint8)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    ink = (20, 20, 20)
+
+    # header band + photo placeholder
+    cv2.rectangle(card, (0, 0), (1000, 110), (40, 140, 250), -1)
+    cv2.putText(card, "Government of India", (300, 70), font, 1.3, ink, 3)
+    cv2.rectangle(card, (50, 160), (250, 410), (150, 150, 150), -1)
+
+    cv2.putText(card, name, (290, 210), font, 1.2, ink, 2)
+    cv2.putText(card, f"DOB: {dob}", (290, 280), font, 1.1, ink, 2)
+    cv2.putText(card, gender.title(), (290, 350), font, 1.1, ink, 2)
+    cv2.putText(card, number, (280, 500), font, 1.8, ink, 4)
+    cv2.line(card, (0, 560), (1000, 560), (40, 40, 200), 3)
+    cv2.putText(card, "Mera Aadhaar, Meri Pehchan", (330, 610), font, 0.9, (40, 40, 200), 2)
+
+    truth = {"name": name, "dob": dob, "gender": gender, "aadhaar": number}
+    return card, truth
+
+
+def degrade(card, rng, difficulty: str):
+    """Noise / blur / rotation / shadow, stronger with difficulty."""
+    if difficulty == "clean":
+        return card
+
+    strength = 1.0 if difficulty == "mild" else 2.0
+    img = card.astype(np.float32)
+    h, w = img.shape[:2]
+
+    # shadow: darker gradient from a random side
+    ramp = np.linspace(1.0, 1.0 - 0.3 * strength * rng.random(), w, dtype=np.float32)
+    if rng.random() < 0.5:
+        ramp = ramp[::-1]
+    img *= ramp[None, :, None]
+
+    # sensor noise
+    img += rng.normal(0, 6 * strength, img.shape)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+
+    # blur
+    k = int(rng.choice([1, 3, 5] if difficulty == "mild" else [3, 5, 7]))
+    if k > 1:
+        img = cv2.GaussianBlur(img, (k, k), 0)
+
+    # rotation (card not perfectly aligned in the photo)
+    angle = rng.uniform(-3, 3) * strength
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    img = cv2.warpAffine(img, m, (w, h), borderMode=cv2.BORDER_REPLICATE)
+
+    # photographed smaller than the scan
+    scale = rng.uniform(0.6, 1.0) if difficulty == "hard" else 1.0
+    if scale < 1.0:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    return img
+
+
+def build_corpus(n: int, seed: int, difficulty: str, save_dir: str | None):
+    rng = np.random.default_rng(seed)
+    corpus = []
+
+    for i in range(n):
+        level = DIFFICULTIES[i % 3] if difficulty == "mixed" else difficulty
+        card, truth = render_card(rng)
+        img = degrade(card, rng, level)
+        corpus.append((img, truth, level))
+
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+            cv2.imwrite(os.path.join(save_dir, f"card_{i:04d}_{level}.jpg"), img)
+
+    return corpus
+
+
+# -------------------------
+# ACCURACY
+# -------------------------
+def normalize(value):
+    return re.sub(r"[^A-Z0-9]", "", str(value or "").upper())
+
+
+def field_hits(result: dict, truth: dict) -> dict:
+    got = {
+        "name": result.get("name"),
+        "dob": result.get("dob"),
+        "gender": result.get("gender"),
+        "aadhaar": result.get("aadhaar_full")
+    }
+    return {f: bool(got[f]) and normalize(got[f]) == normalize(truth[f]) for f in FIELDS}
+
+
+# -------------------------
+# STAGES
+# -------------------------
+def stage_breakdown(corpus):
+    """
+    Every variant through OCR on its own, so each one gets a timing
+    (the real path may batch them or stop early in cascade mode).
+    """
+    timings = {"preprocess": [], "extraction": []}
+
+    for img, _, _ in corpus:
+        with Timer() as t:
+            variants = preprocess_variants(img)
+        timings["preprocess"].append(t.ms)
+
+        for name in OCR_VARIANT_ORDER:
+            if name not in variants:
+                continue
+
+            with Timer() as t:
+                res = run_ocr_multi([variants[name]])[0]
+            timings.setdefault(f"ocr:{name}", []).append(t.ms)
+
+            if res:
+                with Timer() as t:
+                    score_result(res)
+                timings["extraction"].append(t.ms)
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--difficulty", default="mixed", choices=DIFFICULTIES + ["mixed"])
+    parser.add_argument("--save", default=None, help="also write the cards to this folder")
+    parser.add_argument("--no-breakdown", action="store_true", help="skip the per-stage pass")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="exit 1 if any field accuracy is below this (0-1)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.cards, args.seed, args.difficulty, args.save)
+
+    # model load + first inference are not part of the numbers
+    get_ocr()
+    extract_aadhaar_data(corpus[0][0])
+
+    if not args.no_breakdown:
+        timings = stage_breakdown(corpus)
+        print_table("stage time (ms)", {k: summarize(v) for k, v in timings.items()})
+
+    # end to end, exactly what the upload path runs
+    latencies = []
+    hits = {level: {f: [] for f in FIELDS} for level in DIFFICULTIES}
+    variants_used = {}
+    skipped = []
+
+    started = time.perf_counter()
+    for img, truth, level in corpus:
+        with Timer() as t:
+            result = extract_aadhaar_data(img)
+        latencies.append(t.ms)
+
+        for f, ok in field_hits(result, truth).items():
+            hits[level][f].append(ok)
+        variants_used[result.get("variant")] = variants_used.get(result.get("variant"), 0) + 1
+        skipped.append(result.get("variants_skipped", 0))
+    elapsed = time.perf_counter() - started
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+    print_table("extract_aadhaar_data (ms)", {"end_to_end": summarize(latencies)})
+    print_table("throughput", {"run": {
+        "cards": len(corpus),
+        "cards_per_s": round(len(corpus) / elapsed, 2),
+        "variants_skipped_avg": round(float(np.mean(skipped)), 2),
+        "peak_rss_mb": round(peak_rss_mb, 1)
+    }})
+    print_table("winning variant", {str(k): {"cards": v} for k, v in variants_used.items()})
+
+    accuracy = {}
+    for level in DIFFICULTIES:
+        if hits[level]["name"]:
+            accuracy[level] = {f: round(float(np.mean(hits[level][f])), 3) for f in FIELDS}
+    overall = {
+        f: round(float(np.mean([ok for level in DIFFICULTIES for ok in hits[level][f]])), 3)
+        for f in FIELDS
+    }
+    accuracy["overall"] = overall
+    print_table("field accuracy", accuracy)
+
+    if args.min_accuracy is not None:
+        failing = {f: v for f, v in overall.items() if v < args.min_accuracy}
+        if failing:
+            print(f"\nFAIL: below {args.min_accuracy}: {failing}")
+            raise SystemExit(1)
+        print(f"\nOK: every field >= {args.min_accuracy}")
+
+
+if __name__ == "__main__":
+    main()
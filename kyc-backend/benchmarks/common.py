@@ -0,0 +1,57 @@
+import os
+import glob
+import time
+import numpy as np
+
+
+# -------------------------
+# TIMING
+# -------------------------
+class Timer:
+    """with Timer() as t: ...  ->  t.ms"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000
+
+
+def summarize(values):
+    if not values:
+        return {"n": 0}
+
+    arr = np.asarray(values, dtype=float)
+    return {
+        "n": len(arr),
+        "mean": round(float(arr.mean()), 3),
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p95": round(float(np.percentile(arr, 95)), 3),
+        "p99": round(float(np.percentile(arr, 99)), 3),
+        "max": round(float(arr.max()), 3)
+    }
+
+
+def print_table(title, rows: dict):
+    print(f"\n== {title} ==")
+    for name, stats in rows.items():
+        parts = " ".join(f"{k}={v}" for k, v in stats.items())
+        print(f"  {name:<28} {parts}")
+
+
+# -------------------------
+# LOCAL IMAGE SET
+# -------------------------
+def load_pairs(folder: str, left="face", right="selfie"):
+    """
+    Finds <id>_<left>.jpg / <id>_<right>.jpg pairs in `folder`.
+    Returns [(id, left_path, right_path), ...].
+    """
+    pairs = []
+    for left_path in sorted(glob.glob(os.path.join(folder, f"*_{left}.*"))):
+        base = os.path.basename(left_path).rsplit(f"_{left}.", 1)[0]
+        matches = glob.glob(os.path.join(folder, f"{base}_{right}.*"))
+        if matches:
+            pairs.append((base, left_path, matches[0]))
+    return pairs
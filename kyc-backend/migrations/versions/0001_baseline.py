@@ -0,0 +1,120 @@
+"""baseline: the schema create_all used to build
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created before Alembic already have these tables, so each one is
+only created when missing; `alembic upgrade head` adopts them as they are.
+Offline (`--sql`) there is no database to look at, so the script creates
+every table; run it against an empty database.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def existing_tables():
+    # offline mode has no connection to inspect
+    if context.is_offline_mode():
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade():
+    existing = existing_tables()
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("first_name", sa.String()),
+            sa.Column("last_name", sa.String()),
+            sa.Column("email", sa.String(), unique=True),
+            sa.Column("mobile", sa.String()),
+            sa.Column("pan_number", sa.String()),
+            sa.Column("kyc_status", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+
+    if "kyc_documents" not in existing:
+        op.create_table(
+            "kyc_documents",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("aadhaar_front_path", sa.String()),
+            sa.Column("aadhaar_back_path", sa.String()),
+            sa.Column("aadhaar_face_path", sa.String(), nullable=True),
+            sa.Column("selfie_path", sa.String(), nullable=True),
+        )
+
+    if "ocr_data" not in existing:
+        op.create_table(
+            "ocr_data",
+            sa.Column("user_id", sa.Integer(), primary_key=True),
+            sa.Column("aadhaar_number", sa.String()),
+            sa.Column("aadhaar_full", sa.String()),
+            sa.Column("name", sa.String()),
+            sa.Column("dob", sa.String()),
+            sa.Column("gender", sa.String()),
+            sa.Column("confidence_score", sa.Float()),
+        )
+
+    if "face_verification" not in existing:
+        op.create_table(
+            "face_verification",
+            sa.Column("user_id", sa.Integer(), primary_key=True),
+            sa.Column("similarity_score", sa.Float()),
+            sa.Column("match_status", sa.Boolean()),
+        )
+
+    if "liveness_logs" not in existing:
+        op.create_table(
+            "liveness_logs",
+            sa.Column("user_id", sa.Integer(), primary_key=True),
+            sa.Column("blink_detected", sa.Boolean()),
+            sa.Column("head_turn_detected", sa.Boolean()),
+            sa.Column("status", sa.Boolean()),
+        )
+
+    if "kyc_jobs" not in existing:
+        op.create_table(
+            "kyc_jobs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("document_id", sa.Integer(), sa.ForeignKey("kyc_documents.id")),
+            sa.Column("status", sa.String()),
+            sa.Column("stage", sa.String(), nullable=True),
+            sa.Column("result", sa.Text(), nullable=True),
+            sa.Column("error", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if "face_embeddings" not in existing:
+        op.create_table(
+            "face_embeddings",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("file_hash", sa.String()),
+            sa.Column("variant", sa.String()),
+            sa.Column("embedding", sa.LargeBinary(), nullable=True),
+            sa.Column("created_at", sa.DateTime()),
+            sa.UniqueConstraint("file_hash", "variant"),
+        )
+        op.create_index("ix_face_embeddings_file_hash", "face_embeddings", ["file_hash"])
+
+
+def downgrade():
+    op.drop_table("face_embeddings")
+    op.drop_table("kyc_jobs")
+    op.drop_table("liveness_logs")
+    op.drop_table("face_verification")
+    op.drop_table("ocr_data")
+    op.drop_table("kyc_documents")
+    op.drop_table("users")
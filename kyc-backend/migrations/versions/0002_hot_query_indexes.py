@@ -0,0 +1,52 @@
+"""indexes for the latest-document and login lookups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Built CONCURRENTLY on PostgreSQL so a large kyc_documents table stays
+writable while the index is created.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_kyc_documents_user_id_id_desc",
+            "kyc_documents",
+            ["user_id", sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_email_mobile",
+            "users",
+            ["email", "mobile"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_email_mobile",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_kyc_documents_user_id_id_desc",
+            table_name="kyc_documents",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,24 @@
+"""store the name match result on ocr_data
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("ocr_data", sa.Column("name_score", sa.Float(), nullable=True))
+    op.add_column("ocr_data", sa.Column("name_match", sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("ocr_data", "name_match")
+    op.drop_column("ocr_data", "name_score")
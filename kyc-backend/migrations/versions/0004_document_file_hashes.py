@@ -0,0 +1,24 @@
+"""sha256 of the face crop / selfie on kyc_documents
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("kyc_documents", sa.Column("aadhaar_face_hash", sa.String(), nullable=True))
+    op.add_column("kyc_documents", sa.Column("selfie_hash", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("kyc_documents", "selfie_hash")
+    op.drop_column("kyc_documents", "aadhaar_face_hash")
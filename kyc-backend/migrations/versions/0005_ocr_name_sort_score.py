@@ -0,0 +1,22 @@
+"""store the strict token_sort name score the final decision uses
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("ocr_data", sa.Column("name_sort_score", sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("ocr_data", "name_sort_score")
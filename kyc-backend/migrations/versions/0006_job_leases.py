@@ -0,0 +1,24 @@
+"""owner + lease on kyc_jobs, so only abandoned jobs are resumed
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("kyc_jobs", sa.Column("owner", sa.String(), nullable=True))
+    op.add_column("kyc_jobs", sa.Column("lease_until", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("kyc_jobs", "lease_until")
+    op.drop_column("kyc_jobs", "owner")
@@ -0,0 +1,41 @@
+"""key cached face embeddings by model / detector version too
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+Rows from before this revision have no version and can't be trusted
+(computed under unknown detector settings); they are dropped and get
+recomputed on the next face match.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("DELETE FROM face_embeddings")
+    op.add_column("face_embeddings", sa.Column("model_version", sa.String(), nullable=True))
+    # unnamed in 0001, so PostgreSQL's default name
+    op.drop_constraint("face_embeddings_file_hash_variant_key", "face_embeddings", type_="unique")
+    op.create_unique_constraint(
+        "uq_face_embeddings_hash_variant_version",
+        "face_embeddings",
+        ["file_hash", "variant", "model_version"],
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM face_embeddings")
+    op.drop_constraint("uq_face_embeddings_hash_variant_version", "face_embeddings", type_="unique")
+    op.create_unique_constraint(
+        "face_embeddings_file_hash_variant_key",
+        "face_embeddings",
+        ["file_hash", "variant"],
+    )
+    op.drop_column("face_embeddings", "model_version")
@@ -0,0 +1,20 @@
+from app.services.matching_service import sort_score
+
+
+def test_sort_score_ignores_punctuation():
+    assert sort_score("Ram-Prasad Verma", "Ram Prasad Verma") == 100
+    assert sort_score("R.K. Sharma", "r k sharma") == 100
+    assert sort_score("D'Souza, Anita", "Anita D Souza") == 100
+
+
+def test_sort_score_is_an_int():
+    assert isinstance(sort_score("Amit Kumar", "Amit Kumr"), int)
+
+
+def test_sort_score_rejects_a_dropped_surname():
+    assert sort_score("Amit Kumar Sharma", "Amit Kumar") < 80
+
+
+def test_sort_score_no_data():
+    assert sort_score("", "Amit Kumar") == 0
+    assert sort_score("Amit Kumar", None) == 0